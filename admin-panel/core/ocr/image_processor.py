@@ -12,15 +12,24 @@ import cv2
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
 
-try:
-    import easyocr
-except ImportError:
-    print("Installing EasyOCR...")
-    os.system("pip install easyocr")
-    import easyocr
+# EasyOCR pulls in torch, so it is imported on the first OCR request rather than with this module
+easyocr = None
 
 logger = logging.getLogger(__name__)
 
+def _ensure_easyocr():
+    """Import EasyOCR on first use, installing it if missing"""
+    global easyocr
+    if easyocr is None:
+        try:
+            import easyocr as module
+        except ImportError:
+            print("Installing EasyOCR...")
+            os.system("pip install easyocr")
+            import easyocr as module
+        easyocr = module
+    return easyocr
+
 class ImageOCRProcessor:
     def __init__(self):
         self.reader = None
@@ -30,7 +39,7 @@ class ImageOCRProcessor:
     async def initialize(self):
         """Initialize OCR reader with error handling"""
         try:
-            self.reader = easyocr.Reader(['en'], gpu=False)
+            self.reader = _ensure_easyocr().Reader(['en'], gpu=False)
             logger.info("OCR processor initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize OCR: {e}")
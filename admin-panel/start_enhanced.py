@@ -12,9 +12,31 @@ import signal
 import subprocess
 import threading
 import json
+import shutil
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _write_json_file(path, data):
+    """Write data to path as indented JSON, replacing the file atomically"""
+    if orjson is not None:
+        content = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        content = json.dumps(data, indent=2).encode('utf-8')
+    
+    # Write beside the target and swap it in, so an interrupted start never leaves a truncated file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
 class EnhancedSystemLauncher:
     def __init__(self):
         self.processes = []
@@ -45,17 +67,12 @@ class EnhancedSystemLauncher:
         """Verify all required dependencies including Python packages"""
         print("🔍 Checking enhanced system dependencies...")
         
-        # Check Node.js
-        try:
-            result = subprocess.run(['node', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                print(f"   ✅ Node.js: {result.stdout.strip()}")
-            else:
-                print("   ❌ Node.js not found")
-                return False
-        except FileNotFoundError:
+        # Check Node.js (a PATH lookup; no need to start node just to print its version)
+        node_path = shutil.which('node')
+        if node_path is None:
             print("   ❌ Node.js not installed")
             return False
+        print(f"   ✅ Node.js: {node_path}")
         
         # Check Python version
         if sys.version_info < (3, 8):
@@ -74,44 +91,30 @@ class EnhancedSystemLauncher:
             'numpy': 'Numerical computing'
         }
         
+        # Import names of the packages whose pip name differs
+        module_names = {
+            'opencv-python': 'cv2',
+            'pillow': 'PIL'
+        }
+        
+        # Locate each package without importing it (easyocr alone pulls in torch)
+        missing = []
         for package, description in required_packages.items():
+            if importlib.util.find_spec(module_names.get(package, package)) is None:
+                missing.append(package)
+            else:
+                print(f"   ✅ {package}: {description}")
+        
+        # Install everything missing in one pip run, so dependencies are resolved and downloaded once
+        if missing:
+            packages = ', '.join(missing)
+            print(f"   📦 Installing {packages}...")
             try:
-                if package == 'opencv-python':
-                    import cv2
-                    print(f"   ✅ OpenCV: {cv2.__version__}")
-                elif package == 'pillow':
-                    from PIL import Image
-                    print(f"   ✅ Pillow: Image processing ready")
-                elif package == 'easyocr':
-                    # Try to import, install if needed
-                    try:
-                        import easyocr
-                        print(f"   ✅ EasyOCR: Ready for image text extraction")
-                    except ImportError:
-                        print(f"   📦 Installing {package}...")
-                        subprocess.run([sys.executable, '-m', 'pip', 'install', package], 
-                                     capture_output=True)
-                        print(f"   ✅ {package}: Installed")
-                elif package == 'telethon':
-                    try:
-                        import telethon
-                        print(f"   ✅ Telethon: {telethon.__version__}")
-                    except ImportError:
-                        print(f"   📦 Installing {package}...")
-                        subprocess.run([sys.executable, '-m', 'pip', 'install', package], 
-                                     capture_output=True)
-                        print(f"   ✅ {package}: Installed")
-                else:
-                    __import__(package)
-                    print(f"   ✅ {package}: {description}")
-            except ImportError:
-                print(f"   📦 Installing {package}...")
-                try:
-                    subprocess.run([sys.executable, '-m', 'pip', 'install', package], 
-                                 capture_output=True, check=True)
-                    print(f"   ✅ {package}: Installed and ready")
-                except subprocess.CalledProcessError:
-                    print(f"   ⚠️ {package}: Installation failed, using fallback")
+                subprocess.run([sys.executable, '-m', 'pip', 'install', *missing], 
+                             capture_output=True, check=True)
+                print(f"   ✅ {packages}: Installed and ready")
+            except subprocess.CalledProcessError:
+                print(f"   ⚠️ {packages}: Installation failed, using fallback")
         
         print("   ✅ All dependencies verified\n")
         return True
@@ -144,11 +147,6 @@ class EnhancedSystemLauncher:
             "duplicate_prevention": True
         }
         
-        with open('core/config/parser_config.json', 'w') as f:
-            json.dump(parser_config, f, indent=2)
-        
-        print("   ✅ Advanced signal parser initialized")
-        
         # Initialize MT5 bridge configuration
         mt5_config = {
             "multi_user_support": True,
@@ -165,11 +163,6 @@ class EnhancedSystemLauncher:
             }
         }
         
-        with open('core/config/mt5_config.json', 'w') as f:
-            json.dump(mt5_config, f, indent=2)
-        
-        print("   ✅ Enhanced MT5 bridge initialized")
-        
         # Initialize Telegram configuration template
         telegram_config = {
             "sessions": [
@@ -192,9 +185,17 @@ class EnhancedSystemLauncher:
             }
         }
         
-        with open('core/config/telegram_config.json', 'w') as f:
-            json.dump(telegram_config, f, indent=2)
+        # Write the three config files concurrently
+        config_files = [
+            ('core/config/parser_config.json', parser_config),
+            ('core/config/mt5_config.json', mt5_config),
+            ('core/config/telegram_config.json', telegram_config)
+        ]
+        with ThreadPoolExecutor(max_workers=len(config_files)) as executor:
+            list(executor.map(lambda item: _write_json_file(*item), config_files))
         
+        print("   ✅ Advanced signal parser initialized")
+        print("   ✅ Enhanced MT5 bridge initialized")
         print("   ✅ Telegram listener configuration created")
         print("   📝 Edit core/config/telegram_config.json to add your API credentials")
         
@@ -205,19 +206,22 @@ class EnhancedSystemLauncher:
         print("🚀 Starting enhanced Express.js backend with multi-user support...")
         
         try:
-            process = subprocess.Popen(
-                ['npm', 'run', 'dev'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            # Send the server's output straight to a log file: pipes nobody reads fill up
+            # and block the server once the OS buffer is full
+            log_dir = Path('core/storage/logs')
+            log_dir.mkdir(parents=True, exist_ok=True)
+            with open(log_dir / 'backend.log', 'ab') as log_file:
+                process = subprocess.Popen(
+                    ['npm', 'run', 'dev'],
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT
+                )
             
             self.processes.append(('Enhanced Backend Server', process))
             print("   ✅ Multi-user backend server started on port 5000")
             print("   🎛️ Admin dashboard: http://localhost:5000/admin")
             print("   👤 User dashboard: http://localhost:5000/dashboard")
+            print("   📝 Backend log: core/storage/logs/backend.log")
             
         except Exception as e:
             print(f"   ❌ Failed to start backend: {e}")
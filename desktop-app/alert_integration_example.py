@@ -14,11 +14,14 @@ class SignalProcessorWithAlerts:
     Example signal processor that integrates with the Telegram alert system
     """
     
-    def __init__(self):
+    def __init__(self, sync_manager=None):
         # Initialize components
         self.bot = TradingCopilotBot("env.json")
         self.retry_executor = SmartRetryExecutor("config.json")
         
+        # Optional AutoSyncManager; parse outcomes feed its parser health
+        self.sync_manager = sync_manager
+        
         # Start bot in background (non-blocking)
         self.bot_task = None
         
@@ -45,6 +48,7 @@ class SignalProcessorWithAlerts:
         try:
             # Step 1: Parse the signal
             parsed_data = await self._parse_signal(raw_text)
+            self._record_parse(bool(parsed_data))
             
             if not parsed_data:
                 # Alert: Parse error
@@ -57,6 +61,7 @@ class SignalProcessorWithAlerts:
                 
         except Exception as e:
             # Alert: Parse exception
+            self._record_parse(False)
             await self.bot.alert_parse_error(
                 signal_text=raw_text,
                 channel_name=channel_name,
@@ -143,6 +148,11 @@ class SignalProcessorWithAlerts:
             )
             return None
     
+    def _record_parse(self, success: bool):
+        """Report a parse outcome to the sync manager, if one is attached"""
+        if self.sync_manager is not None:
+            self.sync_manager.record_parser_result(success)
+    
     async def _parse_signal(self, raw_text: str) -> dict:
         """
         Mock signal parser - replace with your actual parser
@@ -7,14 +7,21 @@ system status reporting, and configuration management.
 import json
 import logging
 import time
-import threading
-import requests
+import asyncio
+import signal
+import httpx
+import aiosqlite
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
 import MetaTrader5 as mt5
 import os
-import sqlite3
-from dataclasses import dataclass, asdict
+from collections import Counter, deque
+from dataclasses import dataclass, asdict, fields
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +34,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Parse failures kept for the 24h parser-health window; the health rule only
+# distinguishes 0, <5 and >=5, so older entries beyond this add nothing
+PARSER_FAILURE_WINDOW_MAX = 100
+
+def _json_default(obj):
+    """Fallback encoder for values the stdlib json module can't handle"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+def _json_loads(data):
+    """Decode JSON, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj, indent: bool = False) -> bytes:
+    """Encode JSON to bytes, using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=_json_default, option=option)
+    return json.dumps(obj, default=_json_default, indent=2 if indent else None).encode('utf-8')
+
 @dataclass
 class SystemStatus:
     """System status structure for cloud reporting"""
@@ -44,6 +74,10 @@ class SystemStatus:
     version: str
     timestamp: datetime
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow field dict (all fields are flat, so asdict's deep copy is unnecessary)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
 @dataclass
 class StrategyConfig:
     """Strategy configuration from cloud"""
@@ -68,13 +102,34 @@ class AutoSyncManager:
         self.sync_interval = 60  # Pull every 60 seconds as requested
         self.api_key = self.config.get("API_KEY", "")
         
-        # Database for tracking sync state
+        # Request headers and endpoint URLs are fixed for the manager's lifetime
+        self._auth_headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self._push_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
+        }
+        self._urls = {
+            "strategy_config": f"{self.api_base}/api/admin/strategy-config",
+            "symbol_mapping": f"{self.api_base}/api/admin/symbol-mapping",
+            "stealth_config": f"{self.api_base}/api/admin/stealth-config",
+            "lot_settings": f"{self.api_base}/api/admin/lot-settings",
+            "system_status": f"{self.api_base}/api/system/status"
+        }
+        self._etags: Dict[str, str] = {}
+        
+        # Per-endpoint circuit breakers: key -> (consecutive_failures, open_until_monotonic)
+        self._cb: Dict[str, Tuple[int, float]] = {}
+        self.max_backoff_seconds = 3600
+        
+        # Database for tracking sync state (opened in start_sync)
         self.db_path = "auto_sync.db"
-        self._init_database()
+        self.conn: Optional[aiosqlite.Connection] = None
+        self.client: Optional[httpx.AsyncClient] = None
         
         # System state
         self.running = False
-        self.sync_thread = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop_evt = asyncio.Event()
         self.start_time = datetime.now()
         self.last_sync_attempt = None
         self.last_successful_sync = None
@@ -85,6 +140,12 @@ class AutoSyncManager:
         self.stealth_config = {}
         self.lot_settings = {}
         self.error_counts = {"parser": 0, "mt5": 0, "api": 0}
+        self._err_buf: Counter = Counter()
+        
+        # Parser health metrics (fed by record_parser_result); until the first
+        # result arrives, health falls back to the 24h error count
+        self._parser_results_seen = False
+        self._parser_failures = deque(maxlen=PARSER_FAILURE_WINDOW_MAX)
         
         # Initialize MT5 connection
         self._init_mt5()
@@ -104,13 +165,10 @@ class AutoSyncManager:
             logger.error(f"Failed to load config: {e}")
             return {}
     
-    def _init_database(self):
+    async def _init_database(self):
         """Initialize SQLite database for sync tracking"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Sync history table
-        cursor.execute("""
+        await self.conn.execute("""
             CREATE TABLE IF NOT EXISTS sync_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 sync_type TEXT NOT NULL,
@@ -121,7 +179,7 @@ class AutoSyncManager:
         """)
         
         # Error tracking table
-        cursor.execute("""
+        await self.conn.execute("""
             CREATE TABLE IF NOT EXISTS error_tracking (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 error_type TEXT NOT NULL,
@@ -132,9 +190,42 @@ class AutoSyncManager:
                 last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        async with self.conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_error_tracking_key'
+        """) as cursor:
+            has_key_index = await cursor.fetchone() is not None
+        if not has_key_index:
+            # Databases from before the upsert can hold several rows per key; merge them
+            # into the oldest row so the unique index can be built
+            await self.conn.execute("""
+                UPDATE error_tracking SET
+                    count = (SELECT SUM(d.count) FROM error_tracking d
+                             WHERE d.error_type = error_tracking.error_type
+                               AND d.error_message = error_tracking.error_message
+                               AND d.source = error_tracking.source),
+                    first_seen = (SELECT MIN(d.first_seen) FROM error_tracking d
+                                  WHERE d.error_type = error_tracking.error_type
+                                    AND d.error_message = error_tracking.error_message
+                                    AND d.source = error_tracking.source),
+                    last_seen = (SELECT MAX(d.last_seen) FROM error_tracking d
+                                 WHERE d.error_type = error_tracking.error_type
+                                   AND d.error_message = error_tracking.error_message
+                                   AND d.source = error_tracking.source)
+                WHERE id IN (SELECT MIN(id) FROM error_tracking
+                             GROUP BY error_type, error_message, source HAVING COUNT(*) > 1)
+            """)
+            await self.conn.execute("""
+                DELETE FROM error_tracking WHERE id NOT IN (
+                    SELECT MIN(id) FROM error_tracking GROUP BY error_type, error_message, source
+                )
+            """)
+            await self.conn.execute("""
+                CREATE UNIQUE INDEX idx_error_tracking_key
+                ON error_tracking (error_type, error_message, source)
+            """)
         
         # Configuration cache table
-        cursor.execute("""
+        await self.conn.execute("""
             CREATE TABLE IF NOT EXISTS config_cache (
                 key TEXT PRIMARY KEY,
                 value TEXT NOT NULL,
@@ -142,8 +233,7 @@ class AutoSyncManager:
             )
         """)
         
-        conn.commit()
-        conn.close()
+        await self.conn.commit()
     
     def _init_mt5(self) -> bool:
         """Initialize MT5 connection"""
@@ -163,41 +253,64 @@ class AutoSyncManager:
             logger.error(f"MT5 initialization error: {e}")
             return False
     
-    def start_sync(self):
-        """Start the automatic sync process"""
+    async def start_sync(self):
+        """Start the automatic sync process on the running event loop"""
         if self.running:
             logger.warning("Sync already running")
             return
         
+        # One HTTP client and one DB connection are shared by all sync cycles
+        self.client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(retries=1))
+        self.conn = await aiosqlite.connect(self.db_path)
+        await self._init_database()
+        
         self.running = True
-        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
-        self.sync_thread.start()
+        self._stop_evt.clear()
+        self._task = asyncio.create_task(self._sync_loop())
         logger.info("Auto sync started")
     
-    def stop_sync(self):
+    async def stop_sync(self):
         """Stop the automatic sync process"""
         self.running = False
-        if self.sync_thread:
-            self.sync_thread.join(timeout=5)
+        self._stop_evt.set()
+        if self._task:
+            await self._task
+            self._task = None
+        if self.conn:
+            await self._flush_errors()
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        if self.conn:
+            await self.conn.close()
+            self.conn = None
         logger.info("Auto sync stopped")
     
-    def _sync_loop(self):
+    async def _sync_loop(self):
         """Main synchronization loop"""
         while self.running:
+            deadline = time.monotonic() + self.sync_interval
             try:
                 self.last_sync_attempt = datetime.now()
                 
-                # Pull configurations from cloud every 60 seconds
-                strategy_updated = self._pull_strategy_config()
-                symbols_updated = self._pull_symbol_mapping()
-                stealth_updated = self._pull_stealth_config()
-                lot_updated = self._pull_lot_settings()
-                
-                # Push MT5 connection status, parser health, error count to cloud API
-                status_pushed = self._push_system_status()
+                # Pull configurations from cloud and push MT5 connection status,
+                # parser health and error count concurrently
+                (
+                    strategy_updated,
+                    symbols_updated,
+                    stealth_updated,
+                    lot_updated,
+                    status_pushed
+                ) = await asyncio.gather(
+                    self._call_endpoint("strategy_config", self._pull_strategy_config),
+                    self._call_endpoint("symbol_mapping", self._pull_symbol_mapping),
+                    self._call_endpoint("stealth_config", self._pull_stealth_config),
+                    self._call_endpoint("lot_settings", self._pull_lot_settings),
+                    self._call_endpoint("system_status", self._push_system_status)
+                )
                 
                 # Log sync attempt with timestamps
-                self._log_sync_attempt({
+                await self._log_sync_attempt({
                     "strategy_updated": strategy_updated,
                     "symbols_updated": symbols_updated,
                     "stealth_updated": stealth_updated,
@@ -213,33 +326,74 @@ class AutoSyncManager:
                     logger.warning(f"Sync cycle completed with some failures at {datetime.now().isoformat()}")
                     failed_operations = []
                     if not strategy_updated: failed_operations.append("strategy_config")
-                    if not symbols_updated: failed_operations.append("symbol_mapping") 
+                    if not symbols_updated: failed_operations.append("symbol_mapping")
                     if not stealth_updated: failed_operations.append("stealth_config")
                     if not lot_updated: failed_operations.append("lot_settings")
                     if not status_pushed: failed_operations.append("status_push")
                     logger.warning(f"Failed operations: {', '.join(failed_operations)}")
-                
+            
             except Exception as e:
                 logger.error(f"Sync loop error: {e}")
                 self._track_error("sync_loop", str(e), "auto_sync")
             
-            # Wait for next sync interval
-            time.sleep(self.sync_interval)
-    
-    def _pull_strategy_config(self) -> bool:
+            await self._flush_errors()
+            
+            # Wait out the rest of the interval; returns early on stop_sync()
+            try:
+                await asyncio.wait_for(self._stop_evt.wait(), max(0, deadline - time.monotonic()))
+                break
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _call_endpoint(self, key: str, operation) -> bool:
+        """Run a pull/push unless the endpoint's circuit breaker is open"""
+        failures, open_until = self._cb.get(key, (0, 0.0))
+        if time.monotonic() < open_until:
+            logger.debug(f"Skipping {key}: circuit open after {failures} failures")
+            return False
+        
+        ok = await operation()
+        if ok:
+            self._cb.pop(key, None)
+        else:
+            # Back off exponentially from one sync interval up to an hour
+            backoff = min(self.sync_interval * 2 ** failures, self.max_backoff_seconds)
+            self._cb[key] = (failures + 1, time.monotonic() + backoff)
+        return ok
+    
+    async def _fetch_json(self, key: str, timeout: float):
+        """GET an admin endpoint and decode its JSON body.
+        
+        Returns (status_code, data); data is None unless the status is 200. The
+        body is only read for a 200, and the last ETag is sent back so unchanged
+        configs come back as an empty 304.
+        """
+        headers = self._auth_headers
+        etag = self._etags.get(key)
+        if etag:
+            headers = {**headers, "If-None-Match": etag}
+        
+        async with self.client.stream("GET", self._urls[key], headers=headers, timeout=timeout) as response:
+            if response.status_code != 200:
+                return response.status_code, None
+            
+            # Read into this call's own buffer; force_sync can fetch the same
+            # endpoint while the sync loop is mid-read
+            data = _json_loads(await response.aread())
+            if "etag" in response.headers:
+                self._etags[key] = response.headers["etag"]
+            return 200, data
+    
+    async def _pull_strategy_config(self) -> bool:
         """Pull updated strategy configuration from admin API"""
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
-            
             # Get latest strategy configuration
-            response = requests.get(
-                f"{self.api_base}/api/admin/strategy-config",
-                headers=headers,
-                timeout=15
-            )
+            status_code, strategy_data = await self._fetch_json("strategy_config", timeout=15)
             
-            if response.status_code == 200:
-                strategy_data = response.json()
+            if status_code == 304:
+                return True
+            
+            if status_code == 200:
                 
                 # Parse strategy configuration
                 new_strategy = StrategyConfig(
@@ -259,7 +413,7 @@ class AutoSyncManager:
                 # Check if configuration changed
                 if self._strategy_changed(new_strategy):
                     self.current_strategy = new_strategy
-                    self._save_strategy_config(new_strategy)
+                    await self._save_strategy_config(new_strategy)
                     logger.info("Strategy configuration updated from cloud")
                     return True
                 else:
@@ -267,118 +421,101 @@ class AutoSyncManager:
                     return True
             
             else:
-                logger.error(f"Failed to pull strategy config: {response.status_code}")
-                self._track_error("api_pull", f"HTTP {response.status_code}", "strategy_config")
+                logger.error(f"Failed to pull strategy config: {status_code}")
+                self._track_error("api_pull", f"HTTP {status_code}", "strategy_config")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error pulling strategy config: {e}")
             self._track_error("api_pull", str(e), "strategy_config")
             return False
     
-    def _pull_symbol_mapping(self) -> bool:
+    async def _pull_symbol_mapping(self) -> bool:
         """Pull updated symbol mapping from API"""
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            status_code, symbol_data = await self._fetch_json("symbol_mapping", timeout=10)
             
-            response = requests.get(
-                f"{self.api_base}/api/admin/symbol-mapping",
-                headers=headers,
-                timeout=10
-            )
+            if status_code == 304:
+                return True
             
-            if response.status_code == 200:
-                symbol_data = response.json()
+            if status_code == 200:
                 
                 if symbol_data != self.current_symbols:
                     self.current_symbols = symbol_data
-                    self._save_config_cache("symbol_mapping", json.dumps(symbol_data))
+                    await self._save_config_cache("symbol_mapping", _json_dumps(symbol_data).decode())
                     logger.info(f"Symbol mapping updated: {len(symbol_data)} symbols")
                 
                 return True
             else:
-                logger.error(f"Failed to pull symbol mapping: {response.status_code}")
+                logger.error(f"Failed to pull symbol mapping: {status_code}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error pulling symbol mapping: {e}")
             self._track_error("api_pull", str(e), "symbol_mapping")
             return False
     
-    def _pull_stealth_config(self) -> bool:
+    async def _pull_stealth_config(self) -> bool:
         """Pull updated stealth configuration from API"""
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            status_code, stealth_data = await self._fetch_json("stealth_config", timeout=10)
             
-            response = requests.get(
-                f"{self.api_base}/api/admin/stealth-config",
-                headers=headers,
-                timeout=10
-            )
+            if status_code == 304:
+                return True
             
-            if response.status_code == 200:
-                stealth_data = response.json()
+            if status_code == 200:
                 
                 if stealth_data != self.stealth_config:
                     self.stealth_config = stealth_data
-                    self._save_config_cache("stealth_config", json.dumps(stealth_data))
+                    await self._save_config_cache("stealth_config", _json_dumps(stealth_data).decode())
                     logger.info("Stealth configuration updated from cloud")
                 
                 return True
             else:
-                logger.error(f"Failed to pull stealth config: {response.status_code}")
+                logger.error(f"Failed to pull stealth config: {status_code}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error pulling stealth config: {e}")
             self._track_error("api_pull", str(e), "stealth_config")
             return False
     
-    def _pull_lot_settings(self) -> bool:
+    async def _pull_lot_settings(self) -> bool:
         """Pull updated lot settings from API"""
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            status_code, lot_data = await self._fetch_json("lot_settings", timeout=10)
             
-            response = requests.get(
-                f"{self.api_base}/api/admin/lot-settings",
-                headers=headers,
-                timeout=10
-            )
+            if status_code == 304:
+                return True
             
-            if response.status_code == 200:
-                lot_data = response.json()
+            if status_code == 200:
                 
                 if lot_data != self.lot_settings:
                     self.lot_settings = lot_data
-                    self._save_config_cache("lot_settings", json.dumps(lot_data))
+                    await self._save_config_cache("lot_settings", _json_dumps(lot_data).decode())
                     logger.info("Lot settings updated from cloud")
                 
                 return True
             else:
-                logger.error(f"Failed to pull lot settings: {response.status_code}")
+                logger.error(f"Failed to pull lot settings: {status_code}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error pulling lot settings: {e}")
             self._track_error("api_pull", str(e), "lot_settings")
             return False
     
-    def _push_system_status(self) -> bool:
-        """Push MT5 connection status, parser health, error count to cloud API"""
+    async def _push_system_status(self) -> bool:
+        """Push system status to cloud API"""
         try:
             # Collect system status
-            status = self._collect_system_status()
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
-            }
+            status = await self._collect_system_status()
             
             # Push to cloud API
-            response = requests.post(
-                f"{self.api_base}/api/system/status",
-                json=asdict(status),
-                headers=headers,
+            response = await self.client.post(
+                self._urls["system_status"],
+                content=_json_dumps(status.to_dict()),
+                headers=self._push_headers,
                 timeout=15
             )
             
@@ -389,226 +526,60 @@ class AutoSyncManager:
                 logger.error(f"Failed to push system status: {response.status_code}")
                 self._track_error("api_push", f"HTTP {response.status_code}", "system_status")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error pushing system status: {e}")
             self._track_error("api_push", str(e), "system_status")
             return False
     
-    def _collect_system_status(self) -> SystemStatus:
-        """Collect current system status"""
-        # MT5 status
-        mt5_connected = False
-        mt5_account = None
-        mt5_balance = 0.0
-        mt5_equity = 0.0
-        mt5_margin_free = 0.0
-        active_trades = 0
-        
-        try:
-            if mt5.initialize():
-                account_info = mt5.account_info()
-                if account_info:
-                    mt5_connected = True
-                    mt5_account = account_info.login
-                    mt5_balance = account_info.balance
-                    mt5_equity = account_info.equity
-                    mt5_margin_free = account_info.margin_free
-                
-                # Count active trades
-                positions = mt5.positions_get()
-                active_trades = len(positions) if positions else 0
-        except Exception as e:
-            logger.error(f"Error collecting MT5 status: {e}")
-            self._track_error("mt5_status", str(e), "system_collect")
-        
-        # Parser health check
-        parser_health = self._check_parser_health()
-        
-        # Error counts
-        error_count_24h = self._get_error_count_24h()
-        
-        # Signal statistics
-        total_signals_today = self._get_signals_today()
-        last_signal_time = self._get_last_signal_time()
+    def _collect_mt5_status(self) -> Dict[str, Any]:
+        """Read MT5 account and position state (blocking terminal calls)"""
+        mt5_status = {
+            "mt5_connected": False,
+            "mt5_account": None,
+            "mt5_balance": 0.0,
+            "mt5_equity": 0.0,
+            "mt5_margin_free": 0.0,
+            "active_trades": 0
+        }
         
-        # System uptime
-        uptime_seconds = int((datetime.now() - self.start_time).total_seconds())
+        if mt5.initialize():
+            account_info = mt5.account_info()
+            if account_info:
+                mt5_status["mt5_connected"] = True
+                mt5_status["mt5_account"] = account_info.login
+                mt5_status["mt5_balance"] = account_info.balance
+                mt5_status["mt5_equity"] = account_info.equity
+                mt5_status["mt5_margin_free"] = account_info.margin_free
+            
+            # Count active trades
+            positions = mt5.positions_get()
+            mt5_status["active_trades"] = len(positions) if positions else 0
         
-        return SystemStatus(
-            mt5_connected=mt5_connected,
-            mt5_account=mt5_account,
-            mt5_balance=mt5_balance,
-            mt5_equity=mt5_equity,
-            mt5_margin_free=mt5_margin_free,
-            parser_health=parser_health,
-            error_count_24h=error_count_24h,
-            last_signal_time=last_signal_time,
-            active_trades=active_trades,
-            total_signals_today=total_signals_today,
-            uptime_seconds=uptime_seconds,
-            version="1.0.0",
-            timestamp=datetime.now()
-        )
-    
-    def _log_sync_attempt(self, details: Dict[str, Any]):
-        """Log sync attempts with timestamps"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO sync_history (sync_type, status, details)
-                VALUES (?, ?, ?)
-            """, (
-                "full_sync",
-                "completed" if all(details.values()) else "partial",
-                json.dumps(details)
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            # Log to file with timestamp
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            logger.info(f"[{timestamp}] Sync attempt: {details}")
-            
-        except Exception as e:
-            logger.error(f"Failed to log sync attempt: {e}")
-    
-    def _check_parser_health(self) -> str:
-        """Check parser health status"""
-        try:
-            # Check error rates
-            error_count = self._get_error_count_24h()
-            
-            if error_count == 0:
-                return "healthy"
-            elif error_count < 5:
-                return "warning"
-            else:
-                return "error"
-                
-        except Exception:
-            return "error"
+        return mt5_status
     
-    def _get_error_count_24h(self) -> int:
-        """Get error count in last 24 hours"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT COUNT(*) FROM error_tracking 
-                WHERE last_seen > datetime('now', '-24 hours')
-            """)
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            return result[0] if result else 0
-            
-        except Exception:
-            return 0
-    
-    def _get_signals_today(self) -> int:
-        """Get total signals processed today"""
-        # This would connect to your signal database
-        # For now, return a placeholder
-        return 0
-    
-    def _get_last_signal_time(self) -> Optional[datetime]:
-        """Get timestamp of last signal processed"""
-        # This would connect to your signal database
-        # For now, return None
-        return None
-            
-            response = requests.get(
-                f"{self.api_base}/api/admin/stealth-settings",
-                headers=headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                settings_data = response.json()
-                
-                # Save stealth settings
-                self._save_config_cache("stealth_settings", json.dumps(settings_data))
-                logger.debug("Stealth settings updated")
-                return True
-            else:
-                logger.error(f"Failed to pull stealth settings: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error pulling stealth settings: {e}")
-            self._track_error("api_pull", str(e), "stealth_settings")
-            return False
-    
-    def _push_system_status(self) -> bool:
-        """Push system status to cloud API"""
-        try:
-            # Collect system status
-            status = self._collect_system_status()
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
-            }
-            
-            # Push to cloud API
-            response = requests.post(
-                f"{self.api_base}/api/system/status",
-                json=asdict(status),
-                headers=headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                logger.debug("System status pushed successfully")
-                return True
-            else:
-                logger.error(f"Failed to push system status: {response.status_code}")
-                self._track_error("api_push", f"HTTP {response.status_code}", "system_status")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error pushing system status: {e}")
-            self._track_error("api_push", str(e), "system_status")
-            return False
-    
-    def _collect_system_status(self) -> SystemStatus:
+    async def _collect_system_status(self) -> SystemStatus:
         """Collect current system status"""
-        # MT5 status
-        mt5_connected = False
-        mt5_account = None
-        mt5_balance = 0.0
-        mt5_equity = 0.0
-        mt5_margin_free = 0.0
-        active_trades = 0
-        
+        # MT5 status; terminal calls block, so keep them off the event loop
         try:
-            if mt5.initialize():
-                account_info = mt5.account_info()
-                if account_info:
-                    mt5_connected = True
-                    mt5_account = account_info.login
-                    mt5_balance = account_info.balance
-                    mt5_equity = account_info.equity
-                    mt5_margin_free = account_info.margin_free
-                
-                # Count active trades
-                positions = mt5.positions_get()
-                active_trades = len(positions) if positions else 0
+            mt5_status = await asyncio.to_thread(self._collect_mt5_status)
         except Exception as e:
             logger.error(f"Error collecting MT5 status: {e}")
             self._track_error("mt5_status", str(e), "system_collect")
-        
-        # Parser health check
-        parser_health = self._check_parser_health()
+            mt5_status = {
+                "mt5_connected": False,
+                "mt5_account": None,
+                "mt5_balance": 0.0,
+                "mt5_equity": 0.0,
+                "mt5_margin_free": 0.0,
+                "active_trades": 0
+            }
         
         # Error counts
-        error_count_24h = self._get_error_count_24h()
+        error_count_24h = await self._get_error_count_24h()
+        
+        # Parser health check
+        parser_health = self._check_parser_health(error_count_24h)
         
         # Signal statistics
         total_signals_today = self._get_signals_today()
@@ -618,60 +589,58 @@ class AutoSyncManager:
         uptime_seconds = int((datetime.now() - self.start_time).total_seconds())
         
         return SystemStatus(
-            mt5_connected=mt5_connected,
-            mt5_account=mt5_account,
-            mt5_balance=mt5_balance,
-            mt5_equity=mt5_equity,
-            mt5_margin_free=mt5_margin_free,
             parser_health=parser_health,
             error_count_24h=error_count_24h,
             last_signal_time=last_signal_time,
-            active_trades=active_trades,
             total_signals_today=total_signals_today,
             uptime_seconds=uptime_seconds,
             version="2.1.0",
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            **mt5_status
         )
     
-    def _check_parser_health(self) -> str:
-        """Check parser health status"""
+    def record_parser_result(self, success: bool):
+        """Record the outcome of a parse so health can be derived locally"""
+        self._parser_results_seen = True
+        if not success:
+            self._parser_failures.append(time.time())
+    
+    def _check_parser_health(self, error_count_24h: int) -> str:
+        """Check parser health status from in-process metrics"""
         try:
-            # Test parser with simple signal
-            test_response = requests.post(
-                f"{self.api_base}/api/parse-signal",
-                json={"rawText": "EURUSD BUY @1.1000, SL 1.0950, TP 1.1050"},
-                timeout=10
-            )
+            if self._parser_results_seen:
+                # Slide the failure window forward
+                cutoff = time.time() - 24 * 3600
+                while self._parser_failures and self._parser_failures[0] < cutoff:
+                    self._parser_failures.popleft()
+                failures_24h = len(self._parser_failures)
+            else:
+                # Nothing reports parse results in this process; use tracked errors
+                failures_24h = error_count_24h
             
-            if test_response.status_code == 200:
-                result = test_response.json()
-                if result.get("confidence", 0) > 0.5:
-                    return "healthy"
-                else:
-                    return "warning"
+            if failures_24h == 0:
+                return "healthy"
+            elif failures_24h < 5:
+                return "warning"
             else:
                 return "error"
-                
+        
         except Exception as e:
             logger.error(f"Parser health check failed: {e}")
             return "error"
     
-    def _get_error_count_24h(self) -> int:
+    async def _get_error_count_24h(self) -> int:
         """Get error count in last 24 hours"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             cutoff_time = datetime.now() - timedelta(hours=24)
-            cursor.execute("""
-                SELECT SUM(count) FROM error_tracking 
+            async with self.conn.execute("""
+                SELECT SUM(count) FROM error_tracking
                 WHERE last_seen > ?
-            """, (cutoff_time,))
-            
-            result = cursor.fetchone()
-            conn.close()
+            """, (cutoff_time,)) as cursor:
+                result = await cursor.fetchone()
             
-            return result[0] if result and result[0] else 0
+            flushed = result[0] if result and result[0] else 0
+            return flushed + sum(self._err_buf.values())
         except Exception as e:
             logger.error(f"Error getting error count: {e}")
             return 0
@@ -712,92 +681,82 @@ class AutoSyncManager:
             self.current_strategy.confidence_threshold != new_strategy.confidence_threshold
         )
     
-    def _save_strategy_config(self, strategy: StrategyConfig):
+    async def _save_strategy_config(self, strategy: StrategyConfig):
         """Save strategy configuration to local cache"""
         try:
-            strategy_json = json.dumps(asdict(strategy), default=str)
-            self._save_config_cache("strategy_config", strategy_json)
+            strategy_json = _json_dumps(asdict(strategy)).decode()
+            await self._save_config_cache("strategy_config", strategy_json)
             
             # Also save to file for MT5 EA
             strategy_file = "strategy_config.json"
-            with open(strategy_file, 'w') as f:
-                json.dump(asdict(strategy), f, indent=2, default=str)
-                
+            with open(strategy_file, 'wb') as f:
+                f.write(_json_dumps(asdict(strategy), indent=True))
+            
             logger.info(f"Strategy configuration saved to {strategy_file}")
         except Exception as e:
             logger.error(f"Error saving strategy config: {e}")
     
-    def _save_config_cache(self, key: str, value: str):
+    async def _save_config_cache(self, key: str, value: str):
         """Save configuration value to cache"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
+            await self.conn.execute("""
                 INSERT OR REPLACE INTO config_cache (key, value, updated_at)
                 VALUES (?, ?, CURRENT_TIMESTAMP)
             """, (key, value))
-            conn.commit()
-            conn.close()
+            await self.conn.commit()
         except Exception as e:
             logger.error(f"Error saving config cache: {e}")
     
     def _track_error(self, error_type: str, error_message: str, source: str):
-        """Track error occurrence"""
+        """Track error occurrence (buffered until the next flush)"""
+        self._err_buf[(error_type, error_message, source)] += 1
+    
+    async def _flush_errors(self):
+        """Write buffered error counts to the database in one transaction"""
+        if not self._err_buf:
+            return
+        
+        # Swap in a fresh buffer so errors tracked during the write aren't lost or double-counted
+        pending, self._err_buf = self._err_buf, Counter()
+        items = [(error_type, error_message, source, count)
+                 for (error_type, error_message, source), count in pending.items()]
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Check if error already exists
-            cursor.execute("""
-                SELECT id, count FROM error_tracking 
-                WHERE error_type = ? AND error_message = ? AND source = ?
-            """, (error_type, error_message, source))
-            
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing error
-                cursor.execute("""
-                    UPDATE error_tracking 
-                    SET count = count + 1, last_seen = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (existing[0],))
-            else:
-                # Insert new error
-                cursor.execute("""
-                    INSERT INTO error_tracking (error_type, error_message, source)
-                    VALUES (?, ?, ?)
-                """, (error_type, error_message, source))
-            
-            conn.commit()
-            conn.close()
+            await self.conn.executemany("""
+                INSERT INTO error_tracking (error_type, error_message, source, count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (error_type, error_message, source) DO UPDATE
+                SET count = count + excluded.count, last_seen = CURRENT_TIMESTAMP
+            """, items)
+            await self.conn.commit()
         except Exception as e:
-            logger.error(f"Error tracking error: {e}")
+            # Don't leave a half-written batch for the next commit; keep the counts for a retry
+            try:
+                await self.conn.rollback()
+            except Exception:
+                pass
+            self._err_buf.update(pending)
+            logger.error(f"Error flushing tracked errors: {e}")
     
-    def _log_sync_attempt(self, results: Dict):
+    async def _log_sync_attempt(self, results: Dict):
         """Log sync attempt with timestamp and results"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             status = "success" if all(results.values()) else "partial_failure"
-            details = json.dumps(results)
+            details = _json_dumps(results).decode()
             
-            cursor.execute("""
+            await self.conn.execute("""
                 INSERT INTO sync_history (sync_type, status, details)
                 VALUES (?, ?, ?)
             """, ("full_sync", status, details))
-            
-            conn.commit()
-            conn.close()
+            await self.conn.commit()
             
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             logger.info(f"[{timestamp}] Sync attempt logged: {status} - {details}")
-            
+        
         except Exception as e:
             logger.error(f"Error logging sync attempt: {e}")
     
-    def get_sync_status(self) -> Dict:
+    async def get_sync_status(self) -> Dict:
         """Get current sync status"""
         return {
             "running": self.running,
@@ -807,44 +766,72 @@ class AutoSyncManager:
             "uptime_seconds": int((datetime.now() - self.start_time).total_seconds()),
             "current_strategy_loaded": self.current_strategy is not None,
             "symbols_loaded": len(self.current_symbols),
-            "error_count_24h": self._get_error_count_24h()
+            "open_circuits": [key for key, (_, open_until) in self._cb.items() if time.monotonic() < open_until],
+            "error_count_24h": await self._get_error_count_24h()
         }
     
-    def force_sync(self) -> Dict:
+    async def force_sync(self) -> Dict:
         """Force immediate sync and return results"""
         try:
+            strategy_updated, symbols_updated, stealth_updated, status_pushed = await asyncio.gather(
+                self._pull_strategy_config(),
+                self._pull_symbol_mapping(),
+                self._pull_stealth_config(),
+                self._push_system_status()
+            )
             results = {
-                "strategy_updated": self._pull_strategy_config(),
-                "symbols_updated": self._pull_symbol_mapping(),
-                "stealth_updated": self._pull_stealth_config(),
-                "status_pushed": self._push_system_status()
+                "strategy_updated": strategy_updated,
+                "symbols_updated": symbols_updated,
+                "stealth_updated": stealth_updated,
+                "status_pushed": status_pushed
             }
             
-            self._log_sync_attempt(results)
+            await self._log_sync_attempt(results)
+            await self._flush_errors()
             return {"success": True, "results": results}
-            
+        
         except Exception as e:
             logger.error(f"Force sync failed: {e}")
             return {"success": False, "error": str(e)}
 
-# Main execution
-if __name__ == "__main__":
+async def main():
+    """Run the sync manager until interrupted"""
     # Create auto sync manager
     sync_manager = AutoSyncManager()
     
+    # Set by SIGINT/SIGTERM so shutdown doesn't wait for the next status tick
+    shutdown = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, shutdown.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops don't support signal handlers; Ctrl+C still
+            # cancels main() via asyncio.run
+            pass
+    
     try:
         # Start sync process
-        sync_manager.start_sync()
+        await sync_manager.start_sync()
         
-        # Keep running
+        # Report status every minute until shutdown is requested
         while True:
-            time.sleep(60)
-            status = sync_manager.get_sync_status()
-            logger.info(f"Sync status: {status}")
-            
-    except KeyboardInterrupt:
-        logger.info("Shutdown requested")
-        sync_manager.stop_sync()
+            try:
+                await asyncio.wait_for(shutdown.wait(), 60)
+                logger.info("Shutdown requested")
+                break
+            except asyncio.TimeoutError:
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Sync status: %s", await sync_manager.get_sync_status())
+    
     except Exception as e:
         logger.error(f"Main process error: {e}")
-        sync_manager.stop_sync()
\ No newline at end of file
+    finally:
+        await sync_manager.stop_sync()
+
+# Main execution
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Shutdown requested")
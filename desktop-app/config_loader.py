@@ -7,159 +7,290 @@ Loads configuration from env.json and environment variables
 import json
 import os
 import sys
-from typing import Dict, Any, Optional
+from collections import ChainMap
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+except ImportError:
+    FileSystemEventHandler = Observer = PollingObserver = None
+
+class ConfigError(RuntimeError):
+    """Raised when env.json cannot be found, parsed or applied"""
+
+# Sentinel for get_config lookups that should raise instead of defaulting
+_MISSING = object()
+
+# Environment variable -> (section, field) overrides applied on every load
+_ENV_MAP = (
+    # System overrides
+    ('NODE_ENV', ('system', 'environment')),
+    ('API_BASE_URL', ('system', 'api_base_url')),
+    # Admin overrides
+    ('ADMIN_USERNAME', ('admin', 'username')),
+    ('ADMIN_PASSWORD', ('admin', 'password')),
+    # MT5 overrides
+    ('MT5_TERMINAL_PATH', ('mt5', 'terminal_path')),
+    ('MT5_SIGNALS_FILE', ('mt5', 'signals_file')),
+    # Telegram overrides
+    ('TELEGRAM_BOT_TOKEN', ('telegram', 'bot_token')),
+    ('TELEGRAM_CHAT_ID', ('telegram', 'chat_id')),
+    # Cloud API overrides
+    ('CLOUD_API_URL', ('sync', 'cloud_api_url')),
+)
+_ENV_INDEX = dict(_ENV_MAP)
+_ENV_KEYS = frozenset(_ENV_INDEX)
+
+# Sections that feed export_for_mt5_ea; only changes to these rebuild the export
+_MT5_EA_SECTIONS = frozenset(('mt5', 'risk_management'))
+
+# Discovered env.json location, shared by all ConfigLoader instances
+_CONFIG_PATH_CACHE: Optional[str] = None
+
+# env.json schema, compiled once at import; None when fastjsonschema isn't installed
+_SCHEMA_PATH = Path(__file__).parent / "env.schema.json"
+_SCHEMA_VALIDATE = None
+if fastjsonschema is not None and _SCHEMA_PATH.exists():
+    with open(_SCHEMA_PATH, 'r', encoding='utf-8') as _f:
+        _SCHEMA_VALIDATE = fastjsonschema.compile(json.load(_f))
+
 class ConfigLoader:
     """Centralized configuration loader for all Python services"""
     
-    def __init__(self, config_path: str = None):
+    # Raw env.json bytes per absolute path: abspath -> (st_mtime_ns, st_size, data)
+    _CACHE: Dict[str, tuple] = {}
+    
+    def __init__(self, config_path: str = None, watch: bool = False):
         """Initialize configuration loader"""
         self.config_path = config_path or self._find_config_file()
         self.config = None
+        self._version = 0
+        self._composed_cache: Dict[tuple, Mapping[str, Any]] = {}
+        self._mt5_ea_cache: Optional[Mapping[str, Any]] = None
+        self._batch_depth = 0  # open batch_updates blocks; saves wait for the outermost
+        self._pending_save = False
+        self._observer = None
         self._load_config()
+        
+        if watch:
+            self.start_watching()
     
-    def _find_config_file(self) -> str:
+    @staticmethod
+    def _find_config_file() -> str:
         """Find env.json file in project root"""
+        global _CONFIG_PATH_CACHE
+        
+        env_path = os.environ.get('AISIGNALPRO_CONFIG')
+        if env_path:
+            return env_path
+        
+        if _CONFIG_PATH_CACHE is not None:
+            return _CONFIG_PATH_CACHE
+        
         current_dir = Path(__file__).parent
         
-        # Search up the directory tree for env.json
+        # Search up the directory tree for env.json (includes the project root)
         for parent in [current_dir] + list(current_dir.parents):
             config_file = parent / "env.json"
             if config_file.exists():
-                return str(config_file)
-        
-        # Fallback to project root
-        project_root = current_dir.parent
-        config_file = project_root / "env.json"
-        if config_file.exists():
-            return str(config_file)
+                _CONFIG_PATH_CACHE = str(config_file)
+                return _CONFIG_PATH_CACHE
         
-        raise FileNotFoundError(f"env.json configuration file not found. Searched: {current_dir}, {project_root}")
+        raise FileNotFoundError(f"env.json configuration file not found. Searched: {current_dir} and its parents")
     
     def _load_config(self):
         """Load configuration from file and apply environment overrides"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+            config = self._read_config_file()
             
-            # Apply environment variable overrides
-            self._apply_env_overrides()
+            # Apply environment variable overrides before publishing the new config
+            self._apply_env_overrides(config)
+            self.config = config
             
             print(f"✓ Configuration loaded from: {self.config_path}")
             
-        except FileNotFoundError:
-            print(f"❌ Configuration file not found: {self.config_path}")
-            sys.exit(1)
+        except FileNotFoundError as e:
+            raise ConfigError(f"Configuration file not found: {self.config_path}") from e
         except json.JSONDecodeError as e:
-            print(f"❌ Invalid JSON in configuration file: {e}")
-            sys.exit(1)
+            raise ConfigError(f"Invalid JSON in configuration file: {e}") from e
         except Exception as e:
-            print(f"❌ Failed to load configuration: {e}")
-            sys.exit(1)
+            raise ConfigError(f"Failed to load configuration: {e}") from e
     
-    def _apply_env_overrides(self):
-        """Apply environment variable overrides to configuration"""
-        # System overrides
-        if os.getenv('NODE_ENV'):
-            self.config['system']['environment'] = os.getenv('NODE_ENV')
+    def _read_config_file(self) -> Dict[str, Any]:
+        """Parse env.json, skipping the file read while it is unchanged.
         
-        if os.getenv('API_BASE_URL'):
-            self.config['system']['api_base_url'] = os.getenv('API_BASE_URL')
+        The raw bytes are cached rather than the parsed dict: re-parsing them is
+        cheaper than deep-copying a dict, and still gives each loader its own
+        mutable config.
+        """
+        path = os.path.abspath(self.config_path)
+        st = os.stat(path)
         
-        # Admin overrides
-        if os.getenv('ADMIN_USERNAME'):
-            self.config['admin']['username'] = os.getenv('ADMIN_USERNAME')
+        cached = ConfigLoader._CACHE.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return self._parse_config_bytes(cached[2])
         
-        if os.getenv('ADMIN_PASSWORD'):
-            self.config['admin']['password'] = os.getenv('ADMIN_PASSWORD')
+        with open(path, 'rb') as f:
+            data = f.read()
+        config = self._parse_config_bytes(data)
         
-        # MT5 overrides
-        if os.getenv('MT5_TERMINAL_PATH'):
-            self.config['mt5']['terminal_path'] = os.getenv('MT5_TERMINAL_PATH')
+        # Full schema validation only when requested (CI/tests); cached reads skip it
+        if _SCHEMA_VALIDATE is not None and os.getenv('AISIGNALPRO_VALIDATE'):
+            _SCHEMA_VALIDATE(config)
         
-        if os.getenv('MT5_SIGNALS_FILE'):
-            self.config['mt5']['signals_file'] = os.getenv('MT5_SIGNALS_FILE')
-        
-        # Telegram overrides
-        if os.getenv('TELEGRAM_BOT_TOKEN'):
-            self.config['telegram']['bot_token'] = os.getenv('TELEGRAM_BOT_TOKEN')
+        ConfigLoader._CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+        return config
+    
+    @staticmethod
+    def _parse_config_bytes(data: bytes) -> Dict[str, Any]:
+        """Decode env.json bytes, using orjson when available"""
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    
+    def _apply_env_overrides(self, config: Dict[str, Any]):
+        """Apply environment variable overrides to configuration"""
+        hits = _ENV_KEYS & os.environ.keys()
+        if not hits:
+            return
         
-        if os.getenv('TELEGRAM_CHAT_ID'):
-            self.config['telegram']['chat_id'] = os.getenv('TELEGRAM_CHAT_ID')
+        for env_var in hits:
+            value = os.environ[env_var]
+            if value:
+                section, field = _ENV_INDEX[env_var]
+                config[section][field] = value
+    
+    def start_watching(self):
+        """Reload automatically when env.json changes on disk"""
+        if self._observer is not None:
+            return
+        if Observer is None:
+            print("⚠️  watchdog not installed; env.json changes won't be picked up automatically")
+            return
         
-        # Cloud API overrides
-        if os.getenv('CLOUD_API_URL'):
-            self.config['sync']['cloud_api_url'] = os.getenv('CLOUD_API_URL')
+        handler = _ConfigFileHandler(self)
+        watch_dir = os.path.dirname(os.path.abspath(self.config_path))
+        try:
+            observer = Observer()
+            observer.schedule(handler, watch_dir, recursive=False)
+            observer.start()
+        except OSError:
+            # Native backends can run out of watches (e.g. inotify limits); poll instead
+            observer = PollingObserver()
+            observer.schedule(handler, watch_dir, recursive=False)
+            observer.start()
+        self._observer = observer
+    
+    def stop_watching(self):
+        """Stop the env.json watcher, if running"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+    
+    def _reload(self):
+        """Re-read env.json after an on-disk change"""
+        try:
+            self._load_config()
+        except ConfigError as e:
+            # Keep serving the last good config
+            print(f"❌ Failed to reload configuration: {e}")
+            return
+        self._invalidate()
     
-    def get_config(self, section: str = None) -> Dict[str, Any]:
-        """Get configuration section or full config"""
+    def get_config(self, section: str = None, default: Any = _MISSING) -> Dict[str, Any]:
+        """Get configuration section (or default, if given) or full config"""
         if section is None:
             return self.config
         
-        if section not in self.config:
+        value = self.config.get(section, default)
+        if value is _MISSING:
             raise KeyError(f"Configuration section '{section}' not found")
-        
-        return self.config[section]
+        return value
     
     def get_system_config(self) -> Dict[str, Any]:
         """Get system configuration"""
         return self.get_config('system')
     
-    def get_mt5_config(self) -> Dict[str, Any]:
+    def _compose(self, section: str, *extras: str) -> Mapping[str, Any]:
+        """Build (once per config version) a read-only view of a section plus extra sections"""
+        key = (section, self._version)
+        composed = self._composed_cache.get(key)
+        if composed is None:
+            # Layer the extra sections over the base section without copying it
+            # Extras are optional sections; the base section must exist
+            layered = ChainMap({extra: self.get_config(extra, {}) for extra in extras}, self.get_config(section))
+            composed = self._composed_cache[key] = MappingProxyType(layered)
+        return composed
+    
+    def _invalidate(self, section: str = None):
+        """Drop cached views after a section (or, with None, the whole config) changed"""
+        self._version += 1
+        self._composed_cache.clear()
+        if section is None or section in _MT5_EA_SECTIONS:
+            self._mt5_ea_cache = None
+    
+    def get_mt5_config(self) -> Mapping[str, Any]:
         """Get MT5 configuration with risk management"""
-        mt5_config = self.get_config('mt5').copy()
-        mt5_config.update({
-            'risk_management': self.get_config('risk_management'),
-            'alerts': self.get_config('alerts')
-        })
-        return mt5_config
+        return self._compose('mt5', 'risk_management', 'alerts')
     
-    def get_telegram_config(self) -> Dict[str, Any]:
+    def get_telegram_config(self) -> Mapping[str, Any]:
         """Get Telegram configuration"""
-        telegram_config = self.get_config('telegram').copy()
-        telegram_config.update({
-            'admin': self.get_config('admin'),
-            'alerts': self.get_config('alerts')
-        })
-        return telegram_config
+        return self._compose('telegram', 'admin', 'alerts')
     
-    def get_parser_config(self) -> Dict[str, Any]:
+    def get_parser_config(self) -> Mapping[str, Any]:
         """Get parser configuration"""
-        parser_config = self.get_config('parser').copy()
-        parser_config.update({
-            'risk_management': self.get_config('risk_management'),
-            'system': self.get_config('system')
-        })
-        return parser_config
+        return self._compose('parser', 'risk_management', 'system')
     
-    def get_sync_config(self) -> Dict[str, Any]:
+    def get_sync_config(self) -> Mapping[str, Any]:
         """Get sync configuration"""
-        sync_config = self.get_config('sync').copy()
-        sync_config.update({
-            'system': self.get_config('system'),
-            'alerts': self.get_config('alerts')
-        })
-        return sync_config
+        return self._compose('sync', 'system', 'alerts')
     
     def get_database_url(self) -> str:
         """Get database URL from environment (fallback to config)"""
-        return os.getenv('DATABASE_URL', self.config.get('database', {}).get('url', ''))
+        return os.getenv('DATABASE_URL', self.get_config('database', {}).get('url', ''))
     
     def validate_config(self) -> bool:
         """Validate essential configuration values"""
-        required_sections = ['system', 'mt5', 'telegram', 'parser']
-        
-        for section in required_sections:
-            if section not in self.config:
-                print(f"❌ Missing required configuration section: {section}")
+        if _SCHEMA_VALIDATE is not None:
+            try:
+                _SCHEMA_VALIDATE(self.config)
+            except fastjsonschema.JsonSchemaException as e:
+                print(f"❌ Configuration schema validation failed: {e.message}")
+                return False
+        else:
+            required_sections = ['system', 'mt5', 'telegram', 'parser']
+            
+            for section in required_sections:
+                if section not in self.config:
+                    print(f"❌ Missing required configuration section: {section}")
+                    return False
+            
+            # Validate MT5 paths
+            mt5_config = self.get_config('mt5')
+            if not mt5_config.get('terminal_path') or not mt5_config.get('signals_file'):
+                print("❌ MT5 configuration incomplete: missing terminal_path or signals_file")
                 return False
-        
-        # Validate MT5 paths
-        mt5_config = self.get_config('mt5')
-        if not mt5_config.get('terminal_path') or not mt5_config.get('signals_file'):
-            print("❌ MT5 configuration incomplete: missing terminal_path or signals_file")
-            return False
         
         # Validate Telegram token if alerts are enabled
         alerts_config = self.get_config('alerts')
@@ -172,29 +303,43 @@ class ConfigLoader:
         return True
     
     def export_for_mt5_ea(self) -> Dict[str, Any]:
-        """Export configuration for MT5 Expert Advisor"""
-        mt5_config = self.get_mt5_config()
-        
-        return {
-            'SignalFile': mt5_config['signals_file'],
-            'RiskPercent': mt5_config['risk_percent'],
-            'MaxLotSize': mt5_config['max_lot_size'],
-            'EnableStealthMode': mt5_config['enable_stealth_mode'],
-            'MinDelayMS': mt5_config['min_delay_ms'],
-            'MaxDelayMS': mt5_config['max_delay_ms'],
-            'MagicNumber': mt5_config['magic_number'],
-            'EnableTrailingStop': mt5_config['risk_management']['enable_trailing_stop'],
-            'BreakevenPips': mt5_config['risk_management']['breakeven_pips']
-        }
+        """Export configuration for MT5 Expert Advisor (a fresh dict, ready to serialize)"""
+        if self._mt5_ea_cache is None:
+            mt5_config = self.get_mt5_config()
+            
+            self._mt5_ea_cache = MappingProxyType({
+                'SignalFile': mt5_config['signals_file'],
+                'RiskPercent': mt5_config['risk_percent'],
+                'MaxLotSize': mt5_config['max_lot_size'],
+                'EnableStealthMode': mt5_config['enable_stealth_mode'],
+                'MinDelayMS': mt5_config['min_delay_ms'],
+                'MaxDelayMS': mt5_config['max_delay_ms'],
+                'MagicNumber': mt5_config['magic_number'],
+                'EnableTrailingStop': mt5_config['risk_management']['enable_trailing_stop'],
+                'BreakevenPips': mt5_config['risk_management']['breakeven_pips']
+            })
+        return dict(self._mt5_ea_cache)
     
     def save_config(self, config: Dict[str, Any] = None):
         """Save configuration back to file"""
         if config:
             self.config = config
+            self._invalidate()
         
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                payload = orjson.dumps(self.config, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            else:
+                payload = json.dumps(self.config, indent=2, ensure_ascii=False).encode('utf-8')
+            
+            # Write a sibling temp file and swap it in, so a crash never leaves a torn env.json
+            tmp_path = f"{self.config_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_path)
+            ConfigLoader._CACHE.pop(os.path.abspath(self.config_path), None)
             print(f"✓ Configuration saved to: {self.config_path}")
         except Exception as e:
             print(f"❌ Failed to save configuration: {e}")
@@ -206,38 +351,123 @@ class ConfigLoader:
             raise KeyError(f"Configuration section '{section}' not found")
         
         self.config[section].update(updates)
-        self.save_config()
+        self._invalidate(section)
+        if self._batch_depth:
+            self._pending_save = True
+        else:
+            self.save_config()
         print(f"✓ Configuration section '{section}' updated")
+    
+    @contextmanager
+    def batch_updates(self):
+        """Group several update_section calls into a single save.
+        
+        Blocks may be nested; only the outermost one saves, and only if it exits
+        normally. A block that raises rolls its updates back in memory, so no
+        later save writes them.
+        """
+        # update_section only changes top-level keys of a section, so section copies suffice
+        snapshot = {name: dict(value) if isinstance(value, dict) else value
+                    for name, value in self.config.items()}
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            self.config = snapshot
+            self._invalidate()
+            if self._batch_depth == 0:
+                self._pending_save = False
+            raise
+        
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._pending_save:
+            self._pending_save = False
+            self.save_config()
+
+if FileSystemEventHandler is not None:
+    class _ConfigFileHandler(FileSystemEventHandler):
+        """Forwards changes to a loader's env.json (including atomic replaces) to _reload"""
+        
+        def __init__(self, loader: ConfigLoader):
+            super().__init__()
+            self._loader = loader
+            self._path = os.path.abspath(loader.config_path)
+        
+        def on_any_event(self, event):
+            if event.event_type not in ('modified', 'created', 'moved'):
+                return
+            target = getattr(event, 'dest_path', '') or event.src_path
+            if os.path.abspath(target) == self._path:
+                self._loader._reload()
+
+# Global configuration instance, created on first access of `config_loader.loader`
+_module = sys.modules[__name__]
 
-# Global configuration instance
-_config_loader = None
+def __getattr__(name: str):
+    """Lazily create the global loader on first attribute access (PEP 562)"""
+    if name == "loader":
+        inst = ConfigLoader()
+        # Rebind so later lookups are a plain module attribute hit
+        globals()["loader"] = inst
+        return inst
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_config_loader() -> ConfigLoader:
     """Get global configuration loader instance"""
-    global _config_loader
-    if _config_loader is None:
-        _config_loader = ConfigLoader()
-    return _config_loader
+    return _module.loader
 
-def get_config(section: str = None) -> Dict[str, Any]:
+def get_config(section: str = None, default: Any = _MISSING) -> Dict[str, Any]:
     """Convenience function to get configuration"""
-    return get_config_loader().get_config(section)
+    return _module.loader.get_config(section, default)
 
-def get_mt5_config() -> Dict[str, Any]:
+def get_system_config() -> Dict[str, Any]:
+    """Convenience function to get system configuration"""
+    return _module.loader.get_system_config()
+
+def get_mt5_config() -> Mapping[str, Any]:
     """Convenience function to get MT5 configuration"""
-    return get_config_loader().get_mt5_config()
+    return _module.loader.get_mt5_config()
 
-def get_telegram_config() -> Dict[str, Any]:
+def get_telegram_config() -> Mapping[str, Any]:
     """Convenience function to get Telegram configuration"""
-    return get_config_loader().get_telegram_config()
+    return _module.loader.get_telegram_config()
 
-def get_parser_config() -> Dict[str, Any]:
+def get_parser_config() -> Mapping[str, Any]:
     """Convenience function to get parser configuration"""
-    return get_config_loader().get_parser_config()
+    return _module.loader.get_parser_config()
 
-def get_sync_config() -> Dict[str, Any]:
+def get_sync_config() -> Mapping[str, Any]:
     """Convenience function to get sync configuration"""
-    return get_config_loader().get_sync_config()
+    return _module.loader.get_sync_config()
+
+def get_section_streaming(section: str, config_path: str = None) -> Dict[str, Any]:
+    """Read a single top-level section from env.json without parsing the rest.
+    
+    Tokenizes the file only up to the end of the requested section (via ijson)
+    and applies the matching environment overrides. Without ijson the whole
+    file is parsed instead; either way the section is a fresh dict.
+    """
+    path = config_path or ConfigLoader._find_config_file()
+    if ijson is None:
+        with open(path, 'rb') as f:
+            config = ConfigLoader._parse_config_bytes(f.read())
+        if section not in config:
+            raise KeyError(f"Configuration section '{section}' not found")
+        value = config[section]
+    else:
+        with open(path, 'rb') as f:
+            for key, value in ijson.kvitems(f, '', use_float=True):
+                if key == section:
+                    break
+            else:
+                raise KeyError(f"Configuration section '{section}' not found")
+    
+    for env_var, (target_section, field) in _ENV_MAP:
+        if target_section == section and os.environ.get(env_var):
+            value[field] = os.environ[env_var]
+    
+    return value
 
 if __name__ == "__main__":
     # Test configuration loading
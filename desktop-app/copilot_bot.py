@@ -7,20 +7,41 @@ import json
 import logging
 import asyncio
 import os
+import re
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 import MetaTrader5 as mt5
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
-    Application, CommandHandler, ContextTypes, 
+    AIORateLimiter, Application, CommandHandler, ContextTypes, 
     CallbackQueryHandler, MessageHandler, filters
 )
 import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-import requests
+import aiohttp
+import bisect
+import sys
 import threading
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from ciso8601 import parse_rfc3339 as _parse_timestamp
+except ImportError:
+    if sys.version_info >= (3, 11):
+        _parse_timestamp = datetime.fromisoformat  # accepts a trailing 'Z' since 3.11
+    else:
+        def _parse_timestamp(value: str) -> datetime:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -32,6 +53,298 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _drain(buffer: deque) -> list:
+    """Pop everything currently in a deque (safe against concurrent appends)"""
+    items = []
+    while buffer:
+        items.append(buffer.popleft())
+    return items
+
+def _json_loads(data):
+    """Decode JSON, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+_PREVIEW_ENCODER = json.JSONEncoder(indent=2)
+
+def _json_preview(obj: Any, limit: int) -> str:
+    """First `limit` characters of indented JSON, without serializing the rest"""
+    parts = []
+    size = 0
+    for chunk in _PREVIEW_ENCODER.iterencode(obj):
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return "".join(parts)[:limit]
+
+# Connection settings and schema, applied in one executescript at startup
+SCHEMA_SQL = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+PRAGMA mmap_size=268435456;
+PRAGMA busy_timeout=3000;
+
+CREATE TABLE IF NOT EXISTS blacklisted_pairs (
+    pair TEXT PRIMARY KEY,
+    added_by INTEGER,
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bot_settings (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS command_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    command TEXT,
+    parameters TEXT,
+    executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS pending_retries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    retry_key TEXT,
+    trade_data TEXT,
+    signal_summary TEXT,
+    retry_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS alert_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert_type TEXT,
+    message TEXT,
+    severity TEXT,
+    source TEXT,
+    details TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    acknowledged BOOLEAN DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_cmd_history_time ON command_history(executed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alert_sev_time ON alert_history(severity, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_retries_created ON pending_retries(created_at);
+"""
+
+# Hot-path SQL. Kept as module constants so every call passes the identical
+# text and sqlite3's per-connection statement cache can reuse the compiled plan.
+INSERT_HISTORY_SQL = (
+    "INSERT INTO command_history (user_id, command, parameters, executed_at) "
+    "VALUES (?, ?, ?, datetime(?, 'unixepoch'))"
+)
+UPSERT_SETTING_SQL = (
+    "INSERT INTO bot_settings (key, value) VALUES (?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP"
+)
+INSERT_ALERT_SQL = (
+    "INSERT INTO alert_history (alert_type, message, severity, source, details, created_at) "
+    "VALUES (?, ?, ?, ?, ?, datetime(?, 'unixepoch'))"
+)
+INSERT_BLACKLIST_SQL = "INSERT OR IGNORE INTO blacklisted_pairs (pair, added_by) VALUES (?, ?)"
+INSERT_RETRY_SQL = "INSERT INTO pending_retries (retry_key, trade_data, signal_summary, user_id) VALUES (?, ?, ?, ?)"
+DELETE_RETRY_SQL = "DELETE FROM pending_retries WHERE retry_key = ?"
+EXPIRE_RETRIES_SQL = "DELETE FROM pending_retries WHERE created_at < datetime('now', ?)"
+
+# Static reply text, rendered once. START_TEMPLATE fields: username, admin flag,
+# MT5 status, parser version, stealth mode.
+START_TEMPLATE = """
+🤖 **AI Trading Signal Copilot Bot**
+
+Welcome, %s! You have access to the trading system.
+
+**Available Commands:**
+/status - System and MT5 status
+/trades - Recent trade history  
+/replay <channel> - Replay last signal
+/disable <pair> - Blacklist trading pair
+/stealth <on|off> - Toggle stealth mode
+/channels - List all channels
+/help - Show this help message
+
+**Admin Commands:** %s
+/users - Manage authorized users
+/logs - View system logs
+/settings - Bot configuration
+
+Current Status: %s
+Parser Version: %s
+Stealth Mode: %s
+        """
+
+HELP_TEXT = """
+**🤖 AI Trading Signal Copilot Bot**
+
+**Basic Commands:**
+/status - System and MT5 status
+/trades - Recent trade history (last 3)
+/replay <channel> - Replay last signal from channel
+/disable <pair> - Blacklist trading pair
+/stealth <on|off> - Toggle stealth mode
+/channels - List all configured channels
+
+**Information Commands:**
+/help - Show this help message
+/start - Welcome message and status
+
+**Examples:**
+• `/replay Gold Signals` - Replay from Gold channel
+• `/disable EURUSD` - Blacklist EURUSD pair
+• `/stealth on` - Enable stealth mode
+
+**Tips:**
+• Use inline buttons for quick actions
+• Commands are case-insensitive
+• Partial channel names work for /replay
+        """
+
+ADMIN_HELP_SECTION = """
+**Admin Commands:**
+/users - Manage authorized users
+/logs - View recent system logs
+/settings - Bot configuration
+/blacklist - Manage pair blacklist
+            """
+HELP_ADMIN_TEXT = HELP_TEXT + ADMIN_HELP_SECTION
+
+# One entry of the /trades list
+TRADE_TEMPLATE = """
+**{i}.** {symbol} {action}
+• Size: {lot_size} lots
+• Entry: {entry_price:.5f}
+• P&L: {icon} ${profit:,.2f}
+• Time: {timestamp:%m/%d %H:%M}
+• Magic: {magic}
+            """
+
+# Alert header; body sections are appended by _send_alert
+SEVERITY_ICONS = {
+    "low": "⚠️",
+    "medium": "🟡",
+    "high": "🔴",
+    "critical": "🚨"
+}
+
+ALERT_TEMPLATE = """
+{icon} **SYSTEM ALERT**
+
+**Type:** {alert_type}
+**Severity:** {severity}
+**Source:** {source}
+**Time:** {timestamp:%Y-%m-%d %H:%M:%S}
+
+**Message:** {message}
+        """
+
+# Validation errors that warrant a retry prompt rather than a plain alert
+CRITICAL_VALIDATION_ERRORS = re.compile(r"missing_sl|invalid_lot_size|invalid_pair")
+
+# Outgoing message budget: stay under Telegram's ~30 msg/s global cap. Background
+# broadcasts (alerts, retry prompts) may retry more after a 429 than interactive replies.
+RATE_LIMIT_OVERALL = 28
+RATE_LIMIT_RETRIES = 2
+BROADCAST_RETRIES = 5
+
+# Updates handled at once, and a matching outbound HTTP pool so concurrent replies and
+# message edits don't wait on each other; getUpdates keeps its own single connection
+UPDATE_CONCURRENCY = 256
+BOT_POOL_TIMEOUT = 20
+BOT_CONNECT_TIMEOUT = 10
+BOT_READ_TIMEOUT = 30
+BOT_GET_UPDATES_TIMEOUT = 30
+
+# How long (seconds) one MT5 connection probe is trusted, so a status + trades lookup share it
+MT5_CHECK_TTL = 3.0
+
+# Upper bound (seconds) on the wait between MT5 re-initialization attempts
+MT5_REINIT_MAX_BACKOFF = 60
+
+# Deal-history windows tried in turn until enough recent trades are found
+TRADE_HISTORY_WINDOWS = (timedelta(days=1), timedelta(days=7), timedelta(days=30))
+
+# How often the monitor loop refreshes SQLite's query planner statistics
+DB_OPTIMIZE_INTERVAL = 15 * 60
+
+# Unanswered retry prompts are dropped (memory and database) after this long
+PENDING_RETRY_TTL = timedelta(hours=1)
+# ...and the oldest are dropped early if more than this many are waiting
+PENDING_RETRIES_MAX = 10000
+# How often (seconds) the expiry job sweeps them
+RETRY_EXPIRY_INTERVAL = 60
+
+# Command history, alerts, blacklist additions and settings are buffered and written in batches
+WRITE_FLUSH_INTERVAL = 2.0
+WRITE_FLUSH_SIZE = 64
+
+# MT5 status fields shown by /status, with their fallbacks
+STATUS_MT5_FIELDS = (
+    ('account', 'N/A'),
+    ('server', 'N/A'),
+    ('balance', 0),
+    ('equity', 0),
+    ('free_margin', 0),
+    ('leverage', 0),
+)
+
+# Retry keyboard layouts: rows of (label, action); buttons send "retry_<action>_<retry_id>"
+RETRY_PROMPT_BUTTONS = (
+    (("✅ YES - Retry", "yes"), ("❌ NO - Skip", "no")),
+    (("📝 Edit Parameters", "edit"), ("ℹ️ Show Details", "details")),
+)
+RETRY_EDIT_BUTTONS = (
+    (("✅ Execute As-Is", "yes"), ("❌ Cancel", "no")),
+    (("📊 View Details", "details"),),
+)
+RETRY_DETAILS_BUTTONS = (
+    (("✅ Retry", "yes"), ("❌ Skip", "no")),
+    (("⚙️ Edit", "edit"),),
+)
+
+@lru_cache(maxsize=256)
+def _retry_keyboard(layout: tuple, retry_id: str) -> InlineKeyboardMarkup:
+    """Inline keyboard for one retry; markups are immutable, so repeat taps reuse it"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(label, callback_data=f"retry_{action}_{retry_id}") for label, action in row]
+        for row in layout
+    ])
+
+@lru_cache(maxsize=8)
+def _render_status(mt5_fields: Optional[tuple], api_up: bool, stealth: bool,
+                   blacklist_count: int, parser_version: str) -> str:
+    """Render the snapshot part of the /status report; mt5_fields is None when disconnected"""
+    status_msg = f"""
+**📊 System Status Report**
+
+**MT5 Connection:** {'🟢' if mt5_fields else '🔴'} {'Connected' if mt5_fields else 'Disconnected'}
+"""
+    
+    if mt5_fields:
+        account, server, balance, equity, free_margin, leverage = mt5_fields
+        status_msg += f"""
+• Account: {account}
+• Server: {server}
+• Balance: ${balance:,.2f}
+• Equity: ${equity:,.2f}
+• Free Margin: ${free_margin:,.2f}
+• Leverage: 1:{leverage}
+"""
+    
+    status_msg += f"""
+**API Server:** {'🟢' if api_up else '🔴'} {'Online' if api_up else 'Offline'}
+**Parser Version:** {parser_version}
+**Stealth Mode:** {'🔒 ON' if stealth else '🔓 OFF'}
+**Blacklisted Pairs:** {blacklist_count}
+
+"""
+    return status_msg
+
 @dataclass
 class TradeInfo:
     """Trade information structure"""
@@ -81,8 +394,14 @@ class TradingCopilotBot:
     def __init__(self, config_path: str = "env.json"):
         self.config = self._load_config(config_path)
         self.bot_token = self.config.get("TELEGRAM_BOT_TOKEN")
-        self.authorized_users = self.config.get("AUTHORIZED_USERS", [])
-        self.admin_users = self.config.get("ADMIN_USERS", [])
+        
+        # User ids are checked on every update, so keep them as sets
+        admin_list = self.config.get("ADMIN_USERS", [])
+        self.authorized_users = frozenset(self.config.get("AUTHORIZED_USERS", []))
+        self.admin_users = frozenset(admin_list)
+        self._all_users = self.authorized_users | self.admin_users
+        self._primary_admin = admin_list[0] if admin_list else None
+        self._magic_set = frozenset(self.config.get("MT5_MAGIC_NUMBERS", []))
         
         # System state
         self.blacklisted_pairs = set()
@@ -92,35 +411,46 @@ class TradingCopilotBot:
         # Database for storing bot data
         self._init_database()
         
-        # MT5 connection state
+        # MT5 connection state. The MT5 API is not thread-safe, so every call goes through one worker.
+        self._mt5_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
         self.mt5_connected = False
+        self._mt5_ready = False
+        self._mt5_init_failures = 0
+        self._mt5_next_init = 0.0
+        self._mt5_checked_at = float('-inf')
         self.last_mt5_status = True  # For disconnect alerts
         
+        # Short-lived snapshots so bursts of /status and button taps share one upstream fetch
+        self._mt5_cache: Optional[Tuple[float, Dict]] = None
+        self._mt5_cache_lock = asyncio.Lock()
+        self._trades_cache: Dict[int, Tuple[float, List[TradeInfo]]] = {}  # limit -> snapshot
+        self._trades_cache_lock = asyncio.Lock()
+        self._channels_cache: Optional[Tuple[float, List[ChannelInfo]]] = None
+        self._channels_cache_lock = asyncio.Lock()
+        self._channels_by_name: Dict[str, ChannelInfo] = {}  # lower-cased name -> channel, in API order
+        
         # Alert system
         self.alert_queue = []
         self.pending_retries = {}  # In-memory storage for pending retries
         
-        # Load bot settings
-        self._load_blacklisted_pairs()
-        self._load_bot_settings()
-        
         # Start monitoring system
         self.monitoring_active = False
-        self.monitoring_thread = None
+        self._monitor_task: Optional[asyncio.Task] = None
         self.pending_retries = {}  # Store failed trades pending retry
         
         # Initialize Telegram bot
         self.application = None
         
-        # Start monitoring thread
-        self.monitoring_active = False
-        self.monitoring_thread = None
+        # Shared keep-alive HTTP session for API calls (created on the bot's event loop)
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._api_base = self.config.get("API_BASE_URL", "http://localhost:5000").rstrip('/')
+        self._inflight: Dict[str, asyncio.Task] = {}  # endpoint -> in-flight GET shared by concurrent callers
         
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from JSON file"""
         try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            with open(config_path, 'rb') as f:
+                return _json_loads(f.read())
         except FileNotFoundError:
             # Create default config
             default_config = {
@@ -132,137 +462,200 @@ class TradingCopilotBot:
             }
             with open(config_path, 'w') as f:
                 json.dump(default_config, f, indent=2)
-            logger.warning(f"Created default config at {config_path}. Please update with your credentials.")
+            logger.warning("Created default config at %s. Please update with your credentials.", config_path)
             return default_config
     
     def _init_database(self):
         """Initialize SQLite database for bot state"""
         self.db_path = "copilot_bot.db"
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create tables
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS blacklisted_pairs (
-                pair TEXT PRIMARY KEY,
-                added_by INTEGER,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bot_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS command_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                command TEXT,
-                parameters TEXT,
-                executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS pending_retries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                trade_data TEXT,
-                signal_summary TEXT,
-                retry_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                user_id INTEGER
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS alert_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                alert_type TEXT,
-                message TEXT,
-                severity TEXT,
-                source TEXT,
-                details TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                acknowledged BOOLEAN DEFAULT FALSE
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-        
-        # Load blacklisted pairs
+        self._cmd_log_buf = deque()
+        # Write buffers are deques: handlers append on the event loop while a worker thread drains them
+        self._pending_alerts = deque()
+        self._pending_blacklist = deque()
+        self._pending_settings = deque()  # (key, value); the last value per key wins
+        self._write_behind = False  # True once a periodic flush job is scheduled
+        self._flush_tasks = set()  # In-flight flushes, referenced until they finish
+        
+        # One long-lived autocommit connection shared by every helper; writes go through _db_lock
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        self._db.executescript(SCHEMA_SQL)
+        self._migrate_database()
+        
+        # Load persisted bot state
         self._load_blacklisted_pairs()
         self._load_bot_settings()
     
+    def _migrate_database(self):
+        """Bring tables created by older versions up to the current schema"""
+        # pending_retries rows are keyed by the "retry_<ns>" string the buttons carry;
+        # older tables only had the integer id
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending_retries)")}
+        if "retry_key" not in columns:
+            self._db.execute("ALTER TABLE pending_retries ADD COLUMN retry_key TEXT")
+        self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_retries_key ON pending_retries(retry_key)")
+    
+    def _close_database(self):
+        """Flush buffered writes and close the shared connection (safe to call more than once)"""
+        if self._db is None:
+            return
+        self._write_pending()
+        with self._db_lock:
+            self._db.close()
+            self._db = None
+    
+    def _exec(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Run a statement on the shared connection (reuses its cached prepared statement)"""
+        with self._db_lock:
+            return self._db.execute(sql, params)
+    
     def _load_blacklisted_pairs(self):
         """Load blacklisted pairs from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT pair FROM blacklisted_pairs")
-        self.blacklisted_pairs = {row[0] for row in cursor.fetchall()}
-        conn.close()
+        with self._db_lock:
+            self.blacklisted_pairs = {row[0] for row in self._db.execute("SELECT pair FROM blacklisted_pairs")}
+        # Sorted copy and rendered list for /disable, maintained on add
+        self._blacklist_sorted = sorted(self.blacklisted_pairs)
+        self._blacklist_rendered: Optional[str] = None
     
     def _load_bot_settings(self):
         """Load bot settings from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT key, value FROM bot_settings")
-        settings = dict(cursor.fetchall())
-        conn.close()
+        with self._db_lock:
+            settings = dict(self._db.execute("SELECT key, value FROM bot_settings"))
         
         self.stealth_mode = settings.get("stealth_mode", "false").lower() == "true"
     
     def _save_setting(self, key: str, value: str):
         """Save setting to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO bot_settings (key, value, updated_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-        """, (key, value))
-        conn.commit()
-        conn.close()
+        self._pending_settings.append((key, value))
+        if not self._write_behind:
+            self._request_flush()
     
     def _log_command(self, user_id: int, command: str, parameters: str = ""):
         """Log command execution"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO command_history (user_id, command, parameters)
-            VALUES (?, ?, ?)
-        """, (user_id, command, parameters))
-        conn.commit()
-        conn.close()
+        self._cmd_log_buf.append((user_id, command, parameters, time.time()))
+        if len(self._cmd_log_buf) >= WRITE_FLUSH_SIZE:
+            self._request_flush()
+    
+    def _blacklist_pair(self, pair: str, user_id: int):
+        """Blacklist a pair in memory and queue it for the database"""
+        self.blacklisted_pairs.add(pair)
+        bisect.insort(self._blacklist_sorted, pair)
+        self._blacklist_rendered = None
+        self._pending_blacklist.append((pair, user_id))
+        if not self._write_behind:
+            self._request_flush()
+    
+    def _render_blacklist(self) -> str:
+        """Markdown bullet list of blacklisted pairs, rebuilt only after a change"""
+        if self._blacklist_rendered is None:
+            self._blacklist_rendered = "\n".join(f"• {pair}" for pair in self._blacklist_sorted)
+        return self._blacklist_rendered
+    
+    def _write_pending(self):
+        """Write buffered history, alerts, blacklist and settings changes in one transaction"""
+        with self._db_lock:
+            if self._db is None:
+                return
+            rows = _drain(self._cmd_log_buf)
+            alerts = _drain(self._pending_alerts)
+            blacklist = _drain(self._pending_blacklist)
+            settings = list(dict(_drain(self._pending_settings)).items())
+            if not (rows or alerts or blacklist or settings):
+                return
+            
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                if rows:
+                    self._db.executemany(INSERT_HISTORY_SQL, rows)
+                if alerts:
+                    self._db.executemany(INSERT_ALERT_SQL, alerts)
+                if blacklist:
+                    self._db.executemany(INSERT_BLACKLIST_SQL, blacklist)
+                if settings:
+                    self._db.executemany(UPSERT_SETTING_SQL, settings)
+                self._db.execute("COMMIT")
+            except Exception as e:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                # These changes are already live in memory; requeue them ahead of anything
+                # buffered since, so the next flush retries them in order
+                self._cmd_log_buf.extendleft(reversed(rows))
+                self._pending_alerts.extendleft(reversed(alerts))
+                self._pending_blacklist.extendleft(reversed(blacklist))
+                self._pending_settings.extendleft(reversed(settings))
+                logger.error("Failed to write pending bot state (will retry): %s", e)
+    
+    async def _flush_pending_writes(self, context: ContextTypes.DEFAULT_TYPE = None):
+        """Periodic job: flush buffered database writes"""
+        await asyncio.to_thread(self._write_pending)
+    
+    def _request_flush(self):
+        """Write buffered rows now; from the event loop this runs on a worker thread"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_pending()
+            return
+        task = asyncio.create_task(asyncio.to_thread(self._write_pending))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._on_flush_done)
+    
+    def _on_flush_done(self, task: asyncio.Task):
+        """Log a background flush that raised instead of leaving the error unretrieved"""
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background write flush failed: %s", task.exception())
     
     def _check_authorization(self, user_id: int) -> bool:
         """Check if user is authorized to use the bot"""
-        return user_id in self.authorized_users or user_id in self.admin_users
+        return user_id in self._all_users
     
     def _check_admin(self, user_id: int) -> bool:
         """Check if user has admin privileges"""
         return user_id in self.admin_users
     
+    def _ensure_mt5_initialized(self) -> bool:
+        """Initialize MT5 once; after a failure, retry with exponential backoff"""
+        if self._mt5_ready:
+            return True
+        if time.monotonic() < self._mt5_next_init:
+            return False
+        
+        if mt5.initialize():
+            self._mt5_ready = True
+            self._mt5_init_failures = 0
+            return True
+        
+        self._mt5_init_failures += 1
+        self._mt5_next_init = time.monotonic() + min(2 ** self._mt5_init_failures, MT5_REINIT_MAX_BACKOFF)
+        return False
+    
     def _check_mt5_connection(self) -> bool:
-        """Check MT5 connection status"""
+        """Check MT5 connection status, reusing a probe younger than MT5_CHECK_TTL seconds"""
+        if time.monotonic() - self._mt5_checked_at < MT5_CHECK_TTL:
+            return self.mt5_connected
+        connected = self._probe_mt5_connection()
+        self._mt5_checked_at = time.monotonic()
+        return connected
+    
+    def _probe_mt5_connection(self) -> bool:
+        """Query MT5 for the current connection state"""
         try:
-            if not mt5.initialize():
+            if not self._ensure_mt5_initialized():
                 self.mt5_connected = False
                 return False
             
             account_info = mt5.account_info()
             if account_info is None:
+                # Terminal went away; re-initialize on a later check
+                self._mt5_ready = False
                 self.mt5_connected = False
                 return False
             
             self.mt5_connected = True
             return True
         except Exception as e:
-            logger.error(f"MT5 connection check failed: {e}")
+            logger.error("MT5 connection check failed: %s", e)
             self.mt5_connected = False
             return False
     
@@ -298,88 +691,113 @@ class TradingCopilotBot:
                 "terminal_connected": terminal_info.connected if terminal_info else False
             }
         except Exception as e:
-            logger.error(f"Error getting MT5 status: {e}")
+            logger.error("Error getting MT5 status: %s", e)
             return {"connected": False, "error": str(e)}
     
+    async def _run_mt5(self, func, *args):
+        """Run a blocking MT5 call on the MT5 worker thread without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(self._mt5_executor, func, *args)
+    
     def _get_recent_trades(self, limit: int = 3) -> List[TradeInfo]:
         """Get recent trades from MT5"""
         if not self._check_mt5_connection():
             return []
         
         try:
-            # Get closed positions from the last 30 days
-            from_date = datetime.now() - timedelta(days=30)
-            deals = mt5.history_deals_get(from_date, datetime.now())
-            
-            if deals is None:
-                return []
-            
-            # Filter by magic numbers and convert to TradeInfo
-            magic_numbers = self.config.get("MT5_MAGIC_NUMBERS", [])
-            trades = []
-            
-            for deal in reversed(deals):  # Most recent first
-                if len(trades) >= limit:
+            # Look at the last day first and only widen (up to 30 days) if it holds too few trades
+            now = datetime.now()
+            magic_set = self._magic_set
+            for window in TRADE_HISTORY_WINDOWS:
+                deals = mt5.history_deals_get(now - window, now)
+                if deals is None:
+                    return []
+                # Bot deals, most recent first; stop scanning once we have enough
+                matches = list(islice((deal for deal in reversed(deals) if deal.magic in magic_set), limit))
+                if len(matches) >= limit:
                     break
-                
-                if deal.magic in magic_numbers:
-                    # Get position info
-                    trade_info = TradeInfo(
-                        symbol=deal.symbol,
-                        action="BUY" if deal.type == mt5.DEAL_TYPE_BUY else "SELL",
-                        lot_size=deal.volume,
-                        entry_price=deal.price,
-                        stop_loss=None,  # Not available in deal info
-                        take_profit=None,  # Not available in deal info
-                        profit=deal.profit,
-                        timestamp=datetime.fromtimestamp(deal.time),
-                        status="CLOSED",
-                        magic_number=deal.magic
-                    )
-                    trades.append(trade_info)
             
-            return trades
+            # Convert to TradeInfo
+            return [
+                TradeInfo(
+                    symbol=deal.symbol,
+                    action="BUY" if deal.type == mt5.DEAL_TYPE_BUY else "SELL",
+                    lot_size=deal.volume,
+                    entry_price=deal.price,
+                    stop_loss=None,  # Not available in deal info
+                    take_profit=None,  # Not available in deal info
+                    profit=deal.profit,
+                    timestamp=datetime.fromtimestamp(deal.time),
+                    status="CLOSED",
+                    magic_number=deal.magic
+                )
+                for deal in matches
+            ]
             
         except Exception as e:
-            logger.error(f"Error getting recent trades: {e}")
+            logger.error("Error getting recent trades: %s", e)
             return []
     
-    def _get_api_data(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Optional[Dict]:
-        """Get data from the API server"""
+    def _get_http(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            )
+        return self._http
+    
+    async def _get_api_data(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Optional[Dict]:
+        """Get data from the API server (concurrent identical GETs share one request)"""
+        if method.upper() != "GET":
+            return await self._request_api_data(endpoint, method, data)
+        
+        task = self._inflight.get(endpoint)
+        if task is None:
+            task = asyncio.ensure_future(self._request_api_data(endpoint))
+            self._inflight[endpoint] = task
+            task.add_done_callback(lambda _: self._inflight.pop(endpoint, None))
+        # Shield so one caller being cancelled doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+    
+    async def _request_api_data(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Optional[Dict]:
+        """Perform a single API request"""
         try:
-            api_base = self.config.get("API_BASE_URL", "http://localhost:5000")
-            url = f"{api_base}{endpoint}"
+            url = f"{self._api_base}{endpoint}"
             
             if method.upper() == "POST":
-                response = requests.post(url, json=data, timeout=15)
+                request = self._get_http().post(url, json=data, timeout=aiohttp.ClientTimeout(total=15))
             else:
-                response = requests.get(url, timeout=10)
+                request = self._get_http().get(url, timeout=aiohttp.ClientTimeout(total=10))
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"API error {response.status_code}: {response.text}")
+            async with request as response:
+                if response.status == 200:
+                    return _json_loads(await response.read())
+                if logger.isEnabledFor(logging.ERROR):
+                    logger.error("API error %s: %s", response.status, await response.text())
                 return None
         except Exception as e:
-            logger.error(f"API request failed: {e}")
+            logger.error("API request failed: %s", e)
             return None
     
-    def _get_channels(self) -> List[ChannelInfo]:
+    async def _get_channels(self) -> List[ChannelInfo]:
         """Get channel information from API"""
-        data = self._get_api_data("/api/admin/channels")
+        data = await self._get_api_data("/api/admin/channels")
         if not data:
             return []
         
+        # Fetch every channel's last message concurrently rather than one round-trip at a time
+        latest_messages = await asyncio.gather(*(
+            self._get_api_data(f"/api/messages?channel_id={channel_data['id']}&limit=1")
+            for channel_data in data
+        ))
+        
         channels = []
-        for channel_data in data:
-            # Get last signal from messages
-            messages_data = self._get_api_data(f"/api/messages?channel_id={channel_data['id']}&limit=1")
+        for channel_data, messages_data in zip(data, latest_messages):
             last_signal = None
             last_signal_time = None
             
             if messages_data and len(messages_data) > 0:
                 last_signal = messages_data[0].get("content", "")[:100] + "..."
-                last_signal_time = datetime.fromisoformat(messages_data[0]["createdAt"].replace('Z', '+00:00'))
+                last_signal_time = _parse_timestamp(messages_data[0]["createdAt"])
             
             channel_info = ChannelInfo(
                 id=channel_data["id"],
@@ -392,6 +810,47 @@ class TradingCopilotBot:
         
         return channels
     
+    async def _cached_mt5_status(self, ttl: float = 3.0) -> Dict:
+        """Get MT5 status, reusing a snapshot younger than ttl seconds"""
+        async with self._mt5_cache_lock:
+            if self._mt5_cache and time.monotonic() - self._mt5_cache[0] < ttl:
+                return self._mt5_cache[1]
+            status = await self._run_mt5(self._get_mt5_status)
+            self._mt5_cache = (time.monotonic(), status)
+            return status
+    
+    async def _cached_recent_trades(self, limit: int = 3, ttl: float = 5.0) -> List[TradeInfo]:
+        """Get recent trades, reusing a snapshot younger than ttl seconds"""
+        async with self._trades_cache_lock:
+            cached = self._trades_cache.get(limit)
+            if cached and time.monotonic() - cached[0] < ttl:
+                return cached[1]
+            trades = await self._run_mt5(self._get_recent_trades, limit)
+            self._trades_cache[limit] = (time.monotonic(), trades)
+            return trades
+    
+    async def _cached_channels(self, ttl: float = 10.0) -> List[ChannelInfo]:
+        """Get channel information, reusing a snapshot younger than ttl seconds"""
+        async with self._channels_cache_lock:
+            if self._channels_cache and time.monotonic() - self._channels_cache[0] < ttl:
+                return self._channels_cache[1]
+            channels = await self._get_channels()
+            self._channels_cache = (time.monotonic(), channels)
+            
+            index = {}
+            for channel in channels:
+                index.setdefault(channel.name.lower(), channel)
+            self._channels_by_name = index
+            return channels
+    
+    def _find_channel(self, name: str) -> Optional[ChannelInfo]:
+        """Find a cached channel by exact name, else by the first name containing it (case-insensitive)"""
+        key = name.lower()
+        channel = self._channels_by_name.get(key)
+        if channel is None:
+            channel = next((ch for lc_name, ch in self._channels_by_name.items() if key in lc_name), None)
+        return channel
+    
     # Alert System Methods
     
     async def _send_alert(self, alert: AlertInfo, signal_summary: Optional[SignalSummary] = None):
@@ -399,27 +858,17 @@ class TradingCopilotBot:
         if not self.application:
             return
         
-        # Get severity emoji
-        severity_icons = {
-            "low": "⚠️",
-            "medium": "🟡",
-            "high": "🔴",
-            "critical": "🚨"
-        }
-        
-        icon = severity_icons.get(alert.severity, "⚠️")
+        icon = SEVERITY_ICONS.get(alert.severity, "⚠️")
         
         # Build alert message
-        alert_msg = f"""
-{icon} **SYSTEM ALERT**
-
-**Type:** {alert.alert_type}
-**Severity:** {alert.severity.upper()}
-**Source:** {alert.source}
-**Time:** {alert.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
-
-**Message:** {alert.message}
-        """
+        alert_msg = ALERT_TEMPLATE.format(
+            icon=icon,
+            alert_type=alert.alert_type,
+            severity=alert.severity.upper(),
+            source=alert.source,
+            timestamp=alert.timestamp,
+            message=alert.message
+        )
         
         # Add signal summary if provided
         if signal_summary:
@@ -432,7 +881,7 @@ class TradingCopilotBot:
 
 """
             if signal_summary.parsed_data:
-                alert_msg += f"**Parsed Data:** {json.dumps(signal_summary.parsed_data, indent=2)[:200]}...\n"
+                alert_msg += f"**Parsed Data:** {_json_preview(signal_summary.parsed_data, 200)}...\n"
             
             if signal_summary.confidence:
                 alert_msg += f"**Confidence:** {signal_summary.confidence*100:.1f}%\n"
@@ -442,32 +891,59 @@ class TradingCopilotBot:
         
         # Add details if provided
         if alert.details:
-            alert_msg += f"\n**Details:** {json.dumps(alert.details, indent=2)[:300]}..."
+            alert_msg += f"\n**Details:** {_json_preview(alert.details, 300)}..."
         
         # Save alert to database
         self._save_alert(alert)
         
         # Send to all authorized users
-        for user_id in self.authorized_users + self.admin_users:
-            try:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=alert_msg,
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                logger.error(f"Failed to send alert to user {user_id}: {e}")
+        await self._broadcast(self._all_users, alert_msg, what="alert")
+    
+    async def _broadcast(self, user_ids, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                         what: str = "message"):
+        """Send one Markdown message to several users concurrently, logging per-user failures"""
+        user_ids = list(user_ids)
+        results = await asyncio.gather(*(
+            self.application.bot.send_message(
+                chat_id=user_id,
+                text=text,
+                parse_mode='Markdown',
+                reply_markup=reply_markup,
+                rate_limit_args=BROADCAST_RETRIES
+            )
+            for user_id in user_ids
+        ), return_exceptions=True)
+        
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to send %s to user %s: %s", what, user_id, result)
     
     async def _send_retry_prompt(self, trade_data: Dict, signal_summary: SignalSummary, error_msg: str):
         """Send retry prompt with YES/NO buttons"""
         if not self.application:
             return
         
-        # Generate unique retry ID
-        retry_id = f"retry_{int(time.time() * 1000)}"
+        # Generate unique retry ID (nanoseconds, so two failures in one second don't collide)
+        retry_id = f"retry_{time.time_ns()}"
         
-        # Save pending retry to database
-        self._save_pending_retry(retry_id, trade_data, signal_summary)
+        # Store pending retry
+        self.pending_retries[retry_id] = {
+            "trade_data": trade_data,
+            "signal_summary": signal_summary,
+            "error_message": error_msg,
+            "timestamp": datetime.now()
+        }
+        if len(self.pending_retries) > PENDING_RETRIES_MAX:
+            # Dicts keep insertion order, so the first key is the oldest prompt
+            oldest = next(iter(self.pending_retries))
+            del self.pending_retries[oldest]
+            await asyncio.to_thread(self._remove_pending_retry, oldest)
+        
+        # Save to database; the prompt still goes out if this fails
+        try:
+            await asyncio.to_thread(self._save_pending_retry, retry_id, trade_data, signal_summary)
+        except Exception as e:
+            logger.error("Failed to save pending retry %s: %s", retry_id, e)
         
         # Create retry message with signal summary
         retry_msg = f"""
@@ -483,202 +959,167 @@ class TradingCopilotBot:
 🔧 **Trade Parameters:**
 **Symbol:** {trade_data.get('pair', 'Unknown')}
 **Action:** {trade_data.get('action', 'Unknown')}
-**Entry:** {trade_data.get('entry', 'N/A')}
-**Stop Loss:** {trade_data.get('sl', 'N/A')}
-**Take Profit:** {trade_data.get('tp', 'N/A')}
-**Lot Size:** {trade_data.get('lotSize', 'N/A')}
-
-Would you like to retry this trade?
-        """
-        
-        # Create inline keyboard with YES/NO buttons
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ YES - Retry", callback_data=f"retry_yes_{retry_id}"),
-                InlineKeyboardButton("❌ NO - Skip", callback_data=f"retry_no_{retry_id}")
-            ],
-            [
-                InlineKeyboardButton("📝 Edit Parameters", callback_data=f"retry_edit_{retry_id}"),
-                InlineKeyboardButton("ℹ️ Show Details", callback_data=f"retry_details_{retry_id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # Send to all authorized users
-        for user_id in self.authorized_users + self.admin_users:
-            try:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=retry_msg,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                logger.error(f"Failed to send retry prompt to user {user_id}: {e}")
-        
-        # Generate unique retry ID
-        retry_id = f"retry_{int(time.time())}"
-        
-        # Store pending retry
-        self.pending_retries[retry_id] = {
-            "trade_data": trade_data,
-            "signal_summary": signal_summary,
-            "error_message": error_msg,
-            "timestamp": datetime.now()
-        }
-        
-        # Save to database
-        self._save_pending_retry(retry_id, trade_data, signal_summary)
-        
-        # Build retry message
-        retry_msg = f"""
-🔄 **TRADE RETRY REQUIRED**
-
-**Signal:** {signal_summary.channel_name}
-**Pair:** {trade_data.get('pair', 'Unknown')}
-**Action:** {trade_data.get('action', 'Unknown')}
-**Lot Size:** {trade_data.get('lot_size', 'Unknown')}
 **Entry:** {trade_data.get('entry', 'Market')}
-**SL:** {trade_data.get('sl', 'None')}
-**TP:** {trade_data.get('tp', 'None')}
-
-**Error:** {error_msg}
-**Time:** {signal_summary.timestamp.strftime('%H:%M:%S')}
-
-**Raw Signal:** {signal_summary.raw_text[:200]}...
+**Stop Loss:** {trade_data.get('sl', 'None')}
+**Take Profit:** {trade_data.get('tp', 'None')}
+**Lot Size:** {trade_data.get('lot_size', trade_data.get('lotSize', 'Unknown'))}
 
 Would you like to retry this trade?
         """
         
-        # Create inline keyboard
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ YES - Retry", callback_data=f"retry_yes_{retry_id}"),
-                InlineKeyboardButton("❌ NO - Skip", callback_data=f"retry_no_{retry_id}")
-            ],
-            [
-                InlineKeyboardButton("⚙️ Edit & Retry", callback_data=f"retry_edit_{retry_id}"),
-                InlineKeyboardButton("📊 View Details", callback_data=f"retry_details_{retry_id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Create inline keyboard with YES/NO buttons
+        reply_markup = _retry_keyboard(RETRY_PROMPT_BUTTONS, retry_id)
         
-        # Send to admin users only
-        for user_id in self.admin_users:
-            try:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=retry_msg,
-                    parse_mode='Markdown',
-                    reply_markup=reply_markup
-                )
-            except Exception as e:
-                logger.error(f"Failed to send retry prompt to user {user_id}: {e}")
+        # Send to all authorized users (admins included)
+        await self._broadcast(self._all_users, retry_msg, reply_markup, what="retry prompt")
     
     def _save_alert(self, alert: AlertInfo):
         """Save alert to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO alert_history (alert_type, message, severity, source, details)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
+        self._pending_alerts.append((
             alert.alert_type,
             alert.message,
             alert.severity,
             alert.source,
-            json.dumps(alert.details) if alert.details else None
+            json.dumps(alert.details) if alert.details else None,
+            time.time()
         ))
-        conn.commit()
-        conn.close()
+        if not self._write_behind or len(self._pending_alerts) >= WRITE_FLUSH_SIZE:
+            self._request_flush()
     
     def _save_pending_retry(self, retry_id: str, trade_data: Dict, signal_summary: SignalSummary):
         """Save pending retry to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO pending_retries (id, trade_data, signal_summary, user_id)
-            VALUES (?, ?, ?, ?)
-        """, (
-            retry_id,
-            json.dumps(trade_data),
-            json.dumps(signal_summary.__dict__, default=str),
-            self.admin_users[0] if self.admin_users else None
-        ))
-        conn.commit()
-        conn.close()
+        with self._db_lock:
+            self._db.execute(INSERT_RETRY_SQL, (
+                retry_id,
+                json.dumps(trade_data),
+                json.dumps({
+                    "channel_name": signal_summary.channel_name,
+                    "raw_text": signal_summary.raw_text,
+                    "parsed_data": signal_summary.parsed_data,
+                    "error_message": signal_summary.error_message,
+                    "timestamp": signal_summary.timestamp.isoformat(),
+                    "confidence": signal_summary.confidence
+                }),
+                self._primary_admin
+            ))
     
     def _start_monitoring(self):
-        """Start system monitoring thread"""
+        """Start the system monitoring task on the running event loop"""
         if self.monitoring_active:
             return
         
         self.monitoring_active = True
-        self.monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.monitoring_thread.start()
+        self._monitor_task = asyncio.create_task(self._monitoring_loop())
         logger.info("System monitoring started")
     
-    def _monitoring_loop(self):
+    async def _stop_monitoring(self):
+        """Cancel the monitoring task and wait for it to finish"""
+        self.monitoring_active = False
+        task, self._monitor_task = self._monitor_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def _monitoring_loop(self):
         """Main monitoring loop"""
+        last_optimize = time.monotonic()
         while self.monitoring_active:
             try:
+                now = datetime.now()  # one timestamp per tick, shared by any alerts raised
+                
                 # Check MT5 connection status
-                current_mt5_status = self._check_mt5_connection()
+                current_mt5_status = await self._run_mt5(self._check_mt5_connection)
                 
                 # Check for MT5 disconnect
                 if self.last_mt5_status and not current_mt5_status:
+                    # Don't let /status or /trades serve a pre-disconnect snapshot
+                    self._mt5_cache = None
+                    self._trades_cache.clear()
+                    
                     alert = AlertInfo(
                         alert_type="MT5_DISCONNECTION",
                         message="MT5 connection lost. Trading operations suspended.",
-                        timestamp=datetime.now(),
+                        timestamp=now,
                         severity="critical",
                         source="MT5_Monitor",
                         details={"previous_status": True, "current_status": False}
                     )
                     
-                    # Send alert asynchronously
-                    if self.application:
-                        asyncio.create_task(self._send_alert(alert))
+                    await self._send_alert(alert)
                 
                 self.last_mt5_status = current_mt5_status
                 
                 # Check API server health
-                api_status = self._get_api_data("/api/mt5/status")
+                api_status = await self._get_api_data("/api/mt5/status")
                 if not api_status:
                     alert = AlertInfo(
                         alert_type="API_SERVER_DOWN",
                         message="API server is not responding. System functionality limited.",
-                        timestamp=datetime.now(),
+                        timestamp=now,
                         severity="high",
                         source="API_Monitor"
                     )
                     
-                    if self.application:
-                        asyncio.create_task(self._send_alert(alert))
+                    await self._send_alert(alert)
+                
+                # Forget retry prompts nobody answered (a job does this when the job queue is available)
+                if self.application and not self.application.job_queue:
+                    await self._expire_pending_retries()
+                
+                # Without the periodic flush job, command history would only reach the
+                # database every WRITE_FLUSH_SIZE rows
+                if not self._write_behind:
+                    await self._flush_pending_writes()
+                
+                # Keep planner statistics fresh as the history tables grow
+                if time.monotonic() - last_optimize >= DB_OPTIMIZE_INTERVAL:
+                    await asyncio.to_thread(self._exec, "PRAGMA optimize")
+                    last_optimize = time.monotonic()
                 
                 # Sleep before next check
-                time.sleep(30)  # Check every 30 seconds
+                await asyncio.sleep(30)  # Check every 30 seconds
                 
             except Exception as e:
-                logger.error(f"Monitoring loop error: {e}")
-                time.sleep(60)  # Wait longer on error
+                logger.error("Monitoring loop error: %s", e)
+                await asyncio.sleep(60)  # Wait longer on error
+    
+    async def _expire_pending_retries(self, context: Optional[ContextTypes.DEFAULT_TYPE] = None):
+        """Periodic job: drop pending retries older than PENDING_RETRY_TTL"""
+        cutoff = datetime.now() - PENDING_RETRY_TTL
+        # Entries are in insertion (= age) order, so stop at the first fresh one
+        stale = []
+        for retry_id, retry in self.pending_retries.items():
+            if retry["timestamp"] >= cutoff:
+                break
+            stale.append(retry_id)
+        for retry_id in stale:
+            del self.pending_retries[retry_id]
+        await asyncio.to_thread(
+            self._exec,
+            EXPIRE_RETRIES_SQL,
+            (f"-{int(PENDING_RETRY_TTL.total_seconds())} seconds",)
+        )
     
     # Public API methods for external integration
     
     async def alert_parse_error(self, signal_text: str, channel_name: str, error_msg: str):
         """Alert about signal parsing errors"""
+        now = datetime.now()
         signal_summary = SignalSummary(
             channel_name=channel_name,
             raw_text=signal_text,
             parsed_data=None,
             error_message=error_msg,
-            timestamp=datetime.now()
+            timestamp=now
         )
         
         alert = AlertInfo(
             alert_type="SIGNAL_PARSE_ERROR",
             message=f"Failed to parse signal from {channel_name}",
-            timestamp=datetime.now(),
+            timestamp=now,
             severity="medium",
             source="Signal_Parser"
         )
@@ -687,26 +1128,26 @@ Would you like to retry this trade?
     
     async def alert_strategy_error(self, trade_data: Dict, channel_name: str, validation_errors: List[str]):
         """Alert about strategy validation errors"""
+        now = datetime.now()
         signal_summary = SignalSummary(
             channel_name=channel_name,
             raw_text=trade_data.get("raw_text", ""),
             parsed_data=trade_data,
             error_message="; ".join(validation_errors),
-            timestamp=datetime.now()
+            timestamp=now
         )
         
         alert = AlertInfo(
             alert_type="STRATEGY_VALIDATION_ERROR",
             message=f"Strategy validation failed: {', '.join(validation_errors)}",
-            timestamp=datetime.now(),
+            timestamp=now,
             severity="medium",
             source="Strategy_Validator",
             details={"validation_errors": validation_errors, "trade_data": trade_data}
         )
         
         # Check if this should trigger a retry prompt
-        critical_errors = ["missing_sl", "invalid_lot_size", "invalid_pair"]
-        has_critical_error = any(error in validation_errors[0] for error in critical_errors)
+        has_critical_error = any(CRITICAL_VALIDATION_ERRORS.search(error) for error in validation_errors)
         
         if has_critical_error:
             await self._send_retry_prompt(trade_data, signal_summary, "; ".join(validation_errors))
@@ -751,32 +1192,16 @@ Would you like to retry this trade?
             await update.message.reply_text(
                 "❌ Unauthorized access. Contact administrator for access."
             )
-            logger.warning(f"Unauthorized access attempt from {username} (ID: {user_id})")
+            logger.warning("Unauthorized access attempt from %s (ID: %s)", username, user_id)
             return
         
-        welcome_msg = f"""
-🤖 **AI Trading Signal Copilot Bot**
-
-Welcome, {username}! You have access to the trading system.
-
-**Available Commands:**
-/status - System and MT5 status
-/trades - Recent trade history  
-/replay <channel> - Replay last signal
-/disable <pair> - Blacklist trading pair
-/stealth <on|off> - Toggle stealth mode
-/channels - List all channels
-/help - Show this help message
-
-**Admin Commands:** {'✅' if self._check_admin(user_id) else '❌'}
-/users - Manage authorized users
-/logs - View system logs
-/settings - Bot configuration
-
-Current Status: {'🟢 Connected' if self.mt5_connected else '🔴 Disconnected'}
-Parser Version: {self.parser_version}
-Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
-        """
+        welcome_msg = START_TEMPLATE % (
+            username,
+            '✅' if self._check_admin(user_id) else '❌',
+            '🟢 Connected' if self.mt5_connected else '🔴 Disconnected',
+            self.parser_version,
+            '🔒 ON' if self.stealth_mode else '🔓 OFF',
+        )
         
         await update.message.reply_text(welcome_msg, parse_mode='Markdown')
         self._log_command(user_id, "/start")
@@ -790,38 +1215,18 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
             return
         
         # Get MT5 status
-        mt5_status = self._get_mt5_status()
+        mt5_status = await self._cached_mt5_status()
         
         # Get API server status
-        api_status = self._get_api_data("/api/mt5/status")
-        
-        # Build status message
-        status_icon = "🟢" if mt5_status["connected"] else "🔴"
-        api_icon = "🟢" if api_status else "🔴"
-        
-        status_msg = f"""
-**📊 System Status Report**
-
-**MT5 Connection:** {status_icon} {'Connected' if mt5_status['connected'] else 'Disconnected'}
-"""
+        api_status = await self._get_api_data("/api/mt5/status")
         
+        # Build status message (the snapshot part is memoized; uptime and time are always fresh)
+        mt5_fields = None
         if mt5_status["connected"]:
-            status_msg += f"""
-• Account: {mt5_status.get('account', 'N/A')}
-• Server: {mt5_status.get('server', 'N/A')}
-• Balance: ${mt5_status.get('balance', 0):,.2f}
-• Equity: ${mt5_status.get('equity', 0):,.2f}
-• Free Margin: ${mt5_status.get('free_margin', 0):,.2f}
-• Leverage: 1:{mt5_status.get('leverage', 0)}
-"""
-        
-        status_msg += f"""
-**API Server:** {api_icon} {'Online' if api_status else 'Offline'}
-**Parser Version:** {self.parser_version}
-**Stealth Mode:** {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
-**Blacklisted Pairs:** {len(self.blacklisted_pairs)}
-
-**System Uptime:** {self._get_uptime()}
+            mt5_fields = tuple(mt5_status.get(key, default) for key, default in STATUS_MT5_FIELDS)
+        status_msg = _render_status(
+            mt5_fields, bool(api_status), self.stealth_mode, len(self.blacklisted_pairs), self.parser_version
+        ) + f"""**System Uptime:** {self._get_uptime()}
 **Last Updated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """
         
@@ -849,29 +1254,33 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
             await update.message.reply_text("❌ Unauthorized access.")
             return
         
-        trades = self._get_recent_trades(3)
+        trades = await self._cached_recent_trades(3)
         
         if not trades:
             await update.message.reply_text("📭 No recent trades found.")
             return
         
-        trades_msg = "**📈 Latest 3 Trades**\n\n"
-        
-        for i, trade in enumerate(trades, 1):
-            profit_icon = "💰" if trade.profit >= 0 else "💸"
-            trades_msg += f"""
-**{i}.** {trade.symbol} {trade.action}
-• Size: {trade.lot_size} lots
-• Entry: {trade.entry_price:.5f}
-• P&L: {profit_icon} ${trade.profit:,.2f}
-• Time: {trade.timestamp.strftime('%m/%d %H:%M')}
-• Magic: {trade.magic_number}
-            """
+        parts = ["**📈 Latest 3 Trades**\n\n"]
+        parts.extend(
+            TRADE_TEMPLATE.format(
+                i=i,
+                symbol=trade.symbol,
+                action=trade.action,
+                lot_size=trade.lot_size,
+                entry_price=trade.entry_price,
+                icon="💰" if trade.profit >= 0 else "💸",
+                profit=trade.profit,
+                timestamp=trade.timestamp,
+                magic=trade.magic_number,
+            )
+            for i, trade in enumerate(trades, 1)
+        )
         
         # Add summary
         total_profit = sum(trade.profit for trade in trades)
         profit_icon = "💰" if total_profit >= 0 else "💸"
-        trades_msg += f"\n**Total P&L:** {profit_icon} ${total_profit:,.2f}"
+        parts.append(f"\n**Total P&L:** {profit_icon} ${total_profit:,.2f}")
+        trades_msg = "".join(parts)
         
         await update.message.reply_text(trades_msg, parse_mode='Markdown')
         self._log_command(user_id, "/trades")
@@ -891,13 +1300,8 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
         channel_name = " ".join(context.args)
         
         # Find channel
-        channels = self._get_channels()
-        target_channel = None
-        
-        for channel in channels:
-            if channel_name.lower() in channel.name.lower():
-                target_channel = channel
-                break
+        channels = await self._cached_channels()
+        target_channel = self._find_channel(channel_name)
         
         if not target_channel:
             available_channels = "\n".join([f"• {ch.name}" for ch in channels])
@@ -912,17 +1316,19 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
         
         # Replay the signal (send to parser API)
         try:
-            api_base = self.config.get("API_BASE_URL", "http://localhost:5000")
             replay_data = {
                 "rawText": target_channel.last_signal,
                 "channelId": target_channel.id,
                 "source": "telegram_bot_replay"
             }
             
-            response = requests.post(f"{api_base}/api/parse-signal", json=replay_data, timeout=10)
+            async with self._get_http().post(
+                f"{self._api_base}/api/parse-signal", json=replay_data, timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                status = response.status
+                result = _json_loads(await response.read()) if status == 200 else await response.text()
             
-            if response.status_code == 200:
-                result = response.json()
+            if status == 200:
                 await update.message.reply_text(
                     f"✅ **Signal Replayed Successfully**\n\n"
                     f"**Channel:** {target_channel.name}\n"
@@ -932,7 +1338,7 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
                     f"**Original Time:** {target_channel.last_signal_time.strftime('%m/%d %H:%M') if target_channel.last_signal_time else 'Unknown'}"
                 )
             else:
-                await update.message.reply_text(f"❌ Failed to replay signal: {response.text}")
+                await update.message.reply_text(f"❌ Failed to replay signal: {result}")
                 
         except Exception as e:
             await update.message.reply_text(f"❌ Error replaying signal: {str(e)}")
@@ -950,7 +1356,7 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
         if not context.args:
             # Show current blacklist
             if self.blacklisted_pairs:
-                blacklist_msg = "**🚫 Blacklisted Pairs:**\n" + "\n".join([f"• {pair}" for pair in sorted(self.blacklisted_pairs)])
+                blacklist_msg = "**🚫 Blacklisted Pairs:**\n" + self._render_blacklist()
             else:
                 blacklist_msg = "✅ No pairs are currently blacklisted."
             
@@ -964,18 +1370,8 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
             await update.message.reply_text(f"⚠️ {pair} is already blacklisted.")
             return
         
-        # Add to blacklist
-        self.blacklisted_pairs.add(pair)
-        
-        # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO blacklisted_pairs (pair, added_by) VALUES (?, ?)",
-            (pair, user_id)
-        )
-        conn.commit()
-        conn.close()
+        # Add to blacklist (persisted by the next write flush)
+        self._blacklist_pair(pair, user_id)
         
         await update.message.reply_text(f"🚫 {pair} has been blacklisted and will be ignored for trading.")
         self._log_command(user_id, "/disable", pair)
@@ -1020,25 +1416,26 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
             await update.message.reply_text("❌ Unauthorized access.")
             return
         
-        channels = self._get_channels()
+        channels = await self._cached_channels()
         
         if not channels:
             await update.message.reply_text("📭 No channels configured.")
             return
         
-        channels_msg = "**📡 Configured Channels**\n\n"
+        parts = ["**📡 Configured Channels**\n\n"]
         
         for channel in channels:
             status_icon = "🟢" if channel.is_active else "🔴"
             last_signal_text = "No signals" if not channel.last_signal else f"Last: {channel.last_signal_time.strftime('%m/%d %H:%M') if channel.last_signal_time else 'Unknown'}"
             
-            channels_msg += f"""
+            parts.append(f"""
 **{channel.name}** {status_icon}
 • ID: {channel.id}
 • {last_signal_text}
 • Status: {'Active' if channel.is_active else 'Inactive'}
-            """
+            """)
         
+        channels_msg = "".join(parts)
         await update.message.reply_text(channels_msg, parse_mode='Markdown')
         self._log_command(user_id, "/channels")
     
@@ -1050,40 +1447,7 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
             await update.message.reply_text("❌ Unauthorized access.")
             return
         
-        help_msg = """
-**🤖 AI Trading Signal Copilot Bot**
-
-**Basic Commands:**
-/status - System and MT5 status
-/trades - Recent trade history (last 3)
-/replay <channel> - Replay last signal from channel
-/disable <pair> - Blacklist trading pair
-/stealth <on|off> - Toggle stealth mode
-/channels - List all configured channels
-
-**Information Commands:**
-/help - Show this help message
-/start - Welcome message and status
-
-**Examples:**
-• `/replay Gold Signals` - Replay from Gold channel
-• `/disable EURUSD` - Blacklist EURUSD pair
-• `/stealth on` - Enable stealth mode
-
-**Tips:**
-• Use inline buttons for quick actions
-• Commands are case-insensitive
-• Partial channel names work for /replay
-        """
-        
-        if self._check_admin(user_id):
-            help_msg += """
-**Admin Commands:**
-/users - Manage authorized users
-/logs - View recent system logs
-/settings - Bot configuration
-/blacklist - Manage pair blacklist
-            """
+        help_msg = HELP_ADMIN_TEXT if self._check_admin(user_id) else HELP_TEXT
         
         await update.message.reply_text(help_msg, parse_mode='Markdown')
         self._log_command(user_id, "/help")
@@ -1108,39 +1472,42 @@ Stealth Mode: {'🔒 ON' if self.stealth_mode else '🔓 OFF'}
         
         if query.data == "refresh_status":
             # Refresh status
-            mt5_status = self._get_mt5_status()
+            mt5_status = await self._cached_mt5_status()
             status_msg = f"🔄 **Status Refreshed**\n\nMT5: {'🟢 Connected' if mt5_status['connected'] else '🔴 Disconnected'}\nTime: {datetime.now().strftime('%H:%M:%S')}"
             await query.edit_message_text(status_msg, parse_mode='Markdown')
             
         elif query.data == "show_trades":
             # Show trades inline
-            trades = self._get_recent_trades(3)
+            trades = await self._cached_recent_trades(3)
             if trades:
-                trades_summary = f"📈 **Quick Trades Summary**\n\n"
+                parts = ["📈 **Quick Trades Summary**\n\n"]
                 for trade in trades:
                     profit_icon = "💰" if trade.profit >= 0 else "💸"
-                    trades_summary += f"{trade.symbol} {trade.action}: {profit_icon}${trade.profit:.2f}\n"
+                    parts.append(f"{trade.symbol} {trade.action}: {profit_icon}${trade.profit:.2f}\n")
+                trades_summary = "".join(parts)
                 await query.edit_message_text(trades_summary, parse_mode='Markdown')
             else:
                 await query.edit_message_text("📭 No recent trades found.")
                 
         elif query.data == "show_channels":
             # Show channels inline
-            channels = self._get_channels()
+            channels = await self._cached_channels()
             if channels:
-                channels_summary = "📡 **Channels Summary**\n\n"
+                parts = ["📡 **Channels Summary**\n\n"]
                 for ch in channels[:5]:  # Show first 5
                     status = "🟢" if ch.is_active else "🔴"
-                    channels_summary += f"{status} {ch.name}\n"
+                    parts.append(f"{status} {ch.name}\n")
+                channels_summary = "".join(parts)
                 await query.edit_message_text(channels_summary, parse_mode='Markdown')
             else:
                 await query.edit_message_text("📭 No channels configured.")
     
     async def _handle_retry_callback(self, query, user_id: int):
         """Handle retry button callbacks"""
-        callback_data = query.data
-        action = callback_data.split("_")[1]  # yes, no, edit, details
-        retry_id = "_".join(callback_data.split("_")[2:])
+        # "retry_<action>_<retry_id>"; the id itself contains underscores
+        parts = query.data.split("_", 2)
+        action = parts[1]  # yes, no, edit, details
+        retry_id = parts[2] if len(parts) == 3 else ""
         
         # Get pending retry data
         if retry_id not in self.pending_retries:
@@ -1171,7 +1538,7 @@ The trade has been removed from retry queue.
             
             # Remove from pending retries
             del self.pending_retries[retry_id]
-            self._remove_pending_retry(retry_id)
+            await asyncio.to_thread(self._remove_pending_retry, retry_id)
             
             await query.edit_message_text(response_msg, parse_mode='Markdown')
             
@@ -1186,9 +1553,6 @@ The trade has been removed from retry queue.
     async def _execute_retry(self, query, retry_id: str, trade_data: Dict, signal_summary: SignalSummary):
         """Execute the retry trade"""
         try:
-            # Send trade to API for execution
-            api_base = self.config.get("API_BASE_URL", "http://localhost:5000")
-            
             # Prepare retry payload
             retry_payload = {
                 "rawText": signal_summary.raw_text,
@@ -1198,10 +1562,13 @@ The trade has been removed from retry queue.
                 "retry_data": trade_data
             }
             
-            response = requests.post(f"{api_base}/api/parse-signal", json=retry_payload, timeout=15)
+            async with self._get_http().post(
+                f"{self._api_base}/api/parse-signal", json=retry_payload, timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                status = response.status
+                result = _json_loads(await response.read()) if status == 200 else await response.text()
             
-            if response.status_code == 200:
-                result = response.json()
+            if status == 200:
                 
                 response_msg = f"""
 ✅ **Trade Retry Successful**
@@ -1223,7 +1590,7 @@ The trade has been successfully processed and sent to MT5.
                 response_msg = f"""
 ❌ **Trade Retry Failed**
 
-**Error:** {response.text}
+**Error:** {result}
 **Time:** {datetime.now().strftime('%H:%M:%S')}
 
 The retry attempt failed. Please check the system status.
@@ -1231,7 +1598,7 @@ The retry attempt failed. Please check the system status.
             
             # Remove from pending retries
             del self.pending_retries[retry_id]
-            self._remove_pending_retry(retry_id)
+            await asyncio.to_thread(self._remove_pending_retry, retry_id)
             
             await query.edit_message_text(response_msg, parse_mode='Markdown')
             
@@ -1263,21 +1630,25 @@ Please try again or contact system administrator.
 Use /replay command with corrected parameters or contact admin.
         """
         
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Execute As-Is", callback_data=f"retry_yes_{retry_id}"),
-                InlineKeyboardButton("❌ Cancel", callback_data=f"retry_no_{retry_id}")
-            ],
-            [
-                InlineKeyboardButton("📊 View Details", callback_data=f"retry_details_{retry_id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _retry_keyboard(RETRY_EDIT_BUTTONS, retry_id)
         
         await query.edit_message_text(edit_msg, parse_mode='Markdown', reply_markup=reply_markup)
     
     async def _show_retry_details(self, query, retry_id: str, trade_data: Dict, signal_summary: SignalSummary, error_message: str):
         """Show detailed retry information"""
+        # The details never change for a given retry, so render them on the first tap only
+        retry = self.pending_retries.get(retry_id, {})
+        details_msg = retry.get("details_msg")
+        if details_msg is None:
+            details_msg = self._render_retry_details(trade_data, signal_summary, error_message)
+            retry["details_msg"] = details_msg
+        
+        reply_markup = _retry_keyboard(RETRY_DETAILS_BUTTONS, retry_id)
+        
+        await query.edit_message_text(details_msg, parse_mode='Markdown', reply_markup=reply_markup)
+    
+    def _render_retry_details(self, trade_data: Dict, signal_summary: SignalSummary, error_message: str) -> str:
+        """Build the detailed retry information message"""
         confidence_text = f"{signal_summary.confidence*100:.1f}%" if signal_summary.confidence is not None else "N/A"
         
         details_msg = f"""
@@ -1303,29 +1674,13 @@ Use /replay command with corrected parameters or contact admin.
 {signal_summary.raw_text[:300]}...
 
 **Parsed Data:**
-{json.dumps(signal_summary.parsed_data, indent=2)[:400] if signal_summary.parsed_data else 'None'}...
+{_json_preview(signal_summary.parsed_data, 400) if signal_summary.parsed_data else 'None'}...
         """
-        
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Retry", callback_data=f"retry_yes_{retry_id}"),
-                InlineKeyboardButton("❌ Skip", callback_data=f"retry_no_{retry_id}")
-            ],
-            [
-                InlineKeyboardButton("⚙️ Edit", callback_data=f"retry_edit_{retry_id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(details_msg, parse_mode='Markdown', reply_markup=reply_markup)
+        return details_msg
     
     def _remove_pending_retry(self, retry_id: str):
         """Remove pending retry from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM pending_retries WHERE id = ?", (retry_id,))
-        conn.commit()
-        conn.close()
+        self._exec(DELETE_RETRY_SQL, (retry_id,))
     
     # Utility Methods
     
@@ -1337,12 +1692,16 @@ Use /replay command with corrected parameters or contact admin.
     
     async def error_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle errors"""
-        logger.error(f"Update {update} caused error {context.error}")
+        logger.error("Update %s caused error %s", update, context.error)
         
-        if update and update.effective_message:
-            await update.effective_message.reply_text(
-                "❌ An error occurred while processing your request. Please try again."
-            )
+        if isinstance(update, Update) and update.effective_message:
+            try:
+                await update.effective_message.reply_text(
+                    "❌ An error occurred while processing your request. Please try again."
+                )
+            except Exception as e:
+                # Often the same network failure that got us here; don't raise from the error handler
+                logger.warning("Could not notify user about error: %s", e)
     
     def run_bot(self):
         """Start the Telegram bot"""
@@ -1351,39 +1710,89 @@ Use /replay command with corrected parameters or contact admin.
             return
         
         # Create application
-        self.application = Application.builder().token(self.bot_token).build()
+        builder = (
+            Application.builder()
+            .token(self.bot_token)
+            .concurrent_updates(UPDATE_CONCURRENCY)
+            .connection_pool_size(UPDATE_CONCURRENCY)
+            .pool_timeout(BOT_POOL_TIMEOUT)
+            .connect_timeout(BOT_CONNECT_TIMEOUT)
+            .read_timeout(BOT_READ_TIMEOUT)
+            .get_updates_connection_pool_size(1)
+            .get_updates_pool_timeout(BOT_GET_UPDATES_TIMEOUT)
+            .get_updates_read_timeout(BOT_GET_UPDATES_TIMEOUT)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+        )
+        try:
+            builder.rate_limiter(AIORateLimiter(overall_max_rate=RATE_LIMIT_OVERALL, max_retries=RATE_LIMIT_RETRIES))
+        except RuntimeError:
+            logger.warning("Rate limiter unavailable; install python-telegram-bot[rate-limiter] to enable it")
+        self.application = builder.build()
         
-        # Add command handlers
+        # Add command handlers (those waiting on MT5 or the API don't block the update queue)
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CommandHandler("status", self.status_command))
-        self.application.add_handler(CommandHandler("trades", self.trades_command))
-        self.application.add_handler(CommandHandler("replay", self.replay_command))
+        self.application.add_handler(CommandHandler("status", self.status_command, block=False))
+        self.application.add_handler(CommandHandler("trades", self.trades_command, block=False))
+        self.application.add_handler(CommandHandler("replay", self.replay_command, block=False))
         self.application.add_handler(CommandHandler("disable", self.disable_command))
         self.application.add_handler(CommandHandler("stealth", self.stealth_command))
-        self.application.add_handler(CommandHandler("channels", self.channels_command))
+        self.application.add_handler(CommandHandler("channels", self.channels_command, block=False))
         
         # Add callback query handler
-        self.application.add_handler(CallbackQueryHandler(self.button_callback))
+        self.application.add_handler(CallbackQueryHandler(self.button_callback, block=False))
         
         # Add error handler
         self.application.add_error_handler(self.error_handler)
         
         logger.info("Starting Telegram Copilot Bot...")
-        logger.info(f"Authorized users: {len(self.authorized_users)}")
-        logger.info(f"Admin users: {len(self.admin_users)}")
-        
-        # Start monitoring thread
-        self._start_monitoring()
+        logger.info("Authorized users: %s", len(self.authorized_users))
+        logger.info("Admin users: %s", len(self.admin_users))
+        
+        # Connect to MT5 up front so the first /status doesn't pay for initialize()
+        self._mt5_executor.submit(self._ensure_mt5_initialized)
+        
+        # Flush buffered database writes and expire stale retries periodically (needs the
+        # job-queue extra); without it, blacklist and settings changes are written immediately
+        # and the monitor loop takes over retry expiry
+        if self.application.job_queue:
+            self.application.job_queue.run_repeating(self._flush_pending_writes, interval=WRITE_FLUSH_INTERVAL)
+            self._write_behind = True
+            self.application.job_queue.run_repeating(
+                self._expire_pending_retries, interval=RETRY_EXPIRY_INTERVAL, first=RETRY_EXPIRY_INTERVAL
+            )
         
         # Start the bot
         self.application.run_polling(allowed_updates=Update.ALL_TYPES)
     
+    async def _post_init(self, application: Application):
+        """Set up loop-bound resources once the bot's event loop is running"""
+        self._get_http()
+        
+        # Start monitoring task
+        self._start_monitoring()
+    
+    async def _post_shutdown(self, application: Application):
+        """Release loop-bound resources"""
+        await self._stop_monitoring()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+        self._close_database()
+    
     def stop_bot(self):
         """Stop the Telegram bot"""
+        self.monitoring_active = False
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+        
         if self.application:
             self.application.stop()
             logger.info("Telegram Copilot Bot stopped.")
+        
+        self._mt5_executor.shutdown(wait=True)
+        self._close_database()
 
 
 # Standalone execution
@@ -1394,7 +1803,7 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot failed to start: {e}")
+        logger.error("Bot failed to start: %s", e)
     finally:
         # Cleanup
         mt5.shutdown()
\ No newline at end of file
@@ -3,17 +3,48 @@ Smart Retry Executor for MT5 Trade Management
 Handles trade buffering, intelligent retry logic, and market condition validation
 """
 
+import sys
 import json
+import math
 import time
+import random
 import logging
 import threading
 from datetime import datetime, timedelta
-from queue import Queue, Empty
+from collections import deque
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import MetaTrader5 as mt5
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Default for logging.max_retry_memory: how many retry attempts (and failed trades)
+# are kept in memory for statistics
+MAX_RETRY_ATTEMPTS_RETAINED = 10000
+
+# MT5 order type by (order kind, is buy); any kind other than market/limit is a stop order
+ORDER_TYPES = {
+    ("market", True): mt5.ORDER_TYPE_BUY,
+    ("market", False): mt5.ORDER_TYPE_SELL,
+    ("limit", True): mt5.ORDER_TYPE_BUY_LIMIT,
+    ("limit", False): mt5.ORDER_TYPE_SELL_LIMIT,
+    ("stop", True): mt5.ORDER_TYPE_BUY_STOP,
+    ("stop", False): mt5.ORDER_TYPE_SELL_STOP,
+}
+
+# How long (seconds) a symbol's static properties (point, digits) are trusted
+SYMBOL_META_TTL = 60
+
+# __slots__-backed dataclasses where supported (Python 3.10+); plain dataclasses otherwise
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Default for market_validation.cache_ttl_ms: how long a symbol's market check result is reused
+MARKET_CHECK_CACHE_TTL_MS = 150
+
 
 class RetryReason(Enum):
     """Enumeration of retry reasons for logging and analysis"""
@@ -27,7 +58,7 @@ class RetryReason(Enum):
     PRICE_CHANGED = "price_changed"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TradeRequest:
     """Trade request structure with metadata"""
     symbol: str
@@ -45,6 +76,20 @@ class TradeRequest:
     user_id: Optional[int] = None
     retry_count: int = 0
     max_retries: int = 3
+    # Multi-TP signals: one order per take profit, sent back to back in a single execution.
+    # Legs are dropped from the front as they fill (lot_size shrinks to match), so a retry
+    # only sends the rest
+    take_profits: List[float] = field(default_factory=list)
+    split_volumes: List[float] = field(default_factory=list)
+    # Resolved from order_type/action by add_trade, so execution doesn't re-parse the strings
+    is_buy: bool = field(default=False, init=False, repr=False)
+    is_market: bool = field(default=False, init=False, repr=False)
+    mt5_order_type: int = field(default=0, init=False, repr=False)
+    # timestamp never changes after construction, so it is formatted once for every to_dict()
+    _timestamp_iso: str = field(default="", init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._timestamp_iso = self.timestamp.isoformat()
     
     def to_dict(self) -> Dict:
         """Convert trade request to dictionary for logging"""
@@ -57,13 +102,15 @@ class TradeRequest:
             "take_profit": self.take_profit,
             "order_type": self.order_type,
             "magic_number": self.magic_number,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self._timestamp_iso,
             "retry_count": self.retry_count,
-            "max_retries": self.max_retries
+            "max_retries": self.max_retries,
+            "take_profits": self.take_profits,
+            "split_volumes": self.split_volumes
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RetryAttempt:
     """Retry attempt logging structure"""
     trade_id: str
@@ -91,6 +138,26 @@ class RetryAttempt:
         }
 
 
+@dataclass
+class SymbolMeta:
+    """Static symbol properties, cached between MT5 lookups"""
+    point: float
+    digits: int
+    points_per_pip: int  # 10 on 3/5-digit quotes, else 1
+    pip_value: float  # price change of one pip
+    volume_min: float  # smallest lot the symbol accepts
+    volume_step: float  # lot granularity
+    expires_at: float  # time.monotonic() deadline
+
+
+@dataclass
+class _SymbolShard:
+    """Per-symbol trade queue and the worker thread that drains it"""
+    queue: deque
+    event: threading.Event
+    thread: Optional[threading.Thread] = None
+
+
 class SmartRetryExecutor:
     """
     Advanced retry engine for MT5 trade execution with intelligent market validation
@@ -99,19 +166,49 @@ class SmartRetryExecutor:
     def __init__(self, config_path: str = "config.json"):
         self.config_path = config_path
         self.config = self._load_config()
+        self._cache_config_values()
         
-        # Trade queue and processing
-        self.trade_queue = Queue()
-        self.processing_thread = None
+        # Trade queues, one per symbol with its own worker, so a retry backoff on one symbol
+        # doesn't hold up orders for another. deque append/popleft are atomic, the event wakes the worker
+        self._shards: Dict[str, _SymbolShard] = {}
+        self._shards_lock = threading.Lock()
         self.is_running = False
+        self._stop_event = threading.Event()  # set by stop_processing; wakes workers out of backoff waits
+        
+        # MT5 calls from the symbol workers are serialized; only their backoff waits overlap
+        self._mt5_lock = threading.Lock()
+        # One worker reconnects at a time; the rest wait here, then find the connection restored
+        self._reconnect_lock = threading.Lock()
+        
+        # Retry tracking (ring buffers: only the most recent entries are kept)
+        retained = self.config.get("logging", {}).get("max_retry_memory", MAX_RETRY_ATTEMPTS_RETAINED)
+        self.retry_attempts: deque = deque(maxlen=retained)
+        self.failed_trades: deque = deque(maxlen=retained)
+        self.total_retry_attempts = 0
+        
+        # Failed trades pushed out of the ring buffer are appended here (one JSON object per line)
+        self._failed_trades_lock = threading.Lock()
+        self._failed_trades_file = self.config.get("logging", {}).get("failed_trades_file", "failed_trades.jsonl")
         
-        # Retry tracking
-        self.retry_attempts: List[RetryAttempt] = []
-        self.failed_trades: List[TradeRequest] = []
+        # Running aggregates over retry_attempts, updated as attempts enter and leave the buffer
+        self._stats_lock = threading.Lock()
+        self._stats_successes = 0
+        self._stats_spread_before = 0.0
+        self._stats_spread_after = 0.0
+        self._stats_reasons: Dict[str, int] = {}
+        
+        # Per-thread order_send request dict, reused across attempts
+        self._order_local = threading.local()
+        
+        # Static symbol properties, so spread/slippage math doesn't re-query MT5
+        self._symbol_meta: Dict[str, SymbolMeta] = {}
+        
+        # Recent market check results: symbol -> (monotonic expiry, (is_valid, retry_reason, validation_data))
+        self._market_check_cache: Dict[str, tuple] = {}
         
         # MT5 connection state
         self.mt5_connected = False
-        self.last_connection_check = datetime.now()
+        self._last_connection_check = time.monotonic()
         
         # Setup logging
         self._setup_logging()
@@ -136,13 +233,16 @@ class SmartRetryExecutor:
                 "max_spread_multiplier": 2.0,
                 "slippage_threshold_pips": 5,
                 "check_market_hours": True,
-                "min_free_margin_percent": 20
+                "min_free_margin_percent": 20,
+                "cache_ttl_ms": MARKET_CHECK_CACHE_TTL_MS
             },
             "logging": {
                 "retry_log_file": "retry_log.txt",
                 "log_level": "INFO",
                 "max_log_size_mb": 10,
-                "backup_count": 5
+                "backup_count": 5,
+                "max_retry_memory": MAX_RETRY_ATTEMPTS_RETAINED,
+                "failed_trades_file": "failed_trades.jsonl"
             },
             "mt5_settings": {
                 "connection_timeout": 5,
@@ -167,6 +267,26 @@ class SmartRetryExecutor:
             self.logger.error(f"Invalid JSON in config file: {e}")
             return default_config
     
+    def _cache_config_values(self):
+        """Copy the settings read on every retry into attributes, instead of nested dict lookups"""
+        retry_settings = self.config["retry_settings"]
+        self._cfg_base_delay = retry_settings["base_delay_seconds"]
+        self._cfg_max_delay = retry_settings["max_delay_seconds"]
+        self._cfg_exponential_backoff = retry_settings["exponential_backoff"]
+        self._cfg_retry_window = retry_settings["retry_window_seconds"]
+        self._cfg_max_retries = retry_settings["max_retries"]
+        
+        market_validation = self.config["market_validation"]
+        self._cfg_check_market_hours = market_validation["check_market_hours"]
+        self._cfg_max_spread_multiplier = market_validation["max_spread_multiplier"]
+        self._cfg_min_free_margin_percent = market_validation["min_free_margin_percent"]
+        self._cfg_slippage_threshold = market_validation["slippage_threshold_pips"]
+        self._cfg_market_check_ttl = market_validation.get("cache_ttl_ms", MARKET_CHECK_CACHE_TTL_MS) / 1000
+        
+        mt5_settings = self.config["mt5_settings"]
+        self._cfg_health_check_interval = mt5_settings["health_check_interval"]
+        self._cfg_reconnection_attempts = mt5_settings["reconnection_attempts"]
+    
     def _setup_logging(self):
         """Setup logging configuration"""
         log_config = self.config.get("logging", {})
@@ -211,7 +331,7 @@ class SmartRetryExecutor:
                 return False
             
             self.mt5_connected = True
-            self.last_connection_check = datetime.now()
+            self._last_connection_check = time.monotonic()
             self.logger.info(f"MT5 connected successfully. Account: {account_info.login}")
             return True
             
@@ -222,11 +342,10 @@ class SmartRetryExecutor:
     
     def _check_mt5_connection(self) -> bool:
         """Check MT5 connection status with periodic health checks"""
-        now = datetime.now()
-        health_check_interval = self.config["mt5_settings"]["health_check_interval"]
+        now = time.monotonic()
         
         # Only check if enough time has passed since last check
-        if (now - self.last_connection_check).seconds < health_check_interval:
+        if now - self._last_connection_check < self._cfg_health_check_interval:
             return self.mt5_connected
         
         try:
@@ -238,33 +357,52 @@ class SmartRetryExecutor:
             else:
                 self.mt5_connected = True
                 
-            self.last_connection_check = now
+            self._last_connection_check = now
             return self.mt5_connected
             
         except Exception as e:
             self.logger.error(f"MT5 connection check failed: {e}")
             self.mt5_connected = False
-            self.last_connection_check = now
+            self._last_connection_check = now
             return False
     
     def _reconnect_mt5(self) -> bool:
-        """Attempt to reconnect to MT5"""
-        max_attempts = self.config["mt5_settings"]["reconnection_attempts"]
+        """Attempt to reconnect to MT5.
         
-        for attempt in range(max_attempts):
-            self.logger.info(f"Reconnection attempt {attempt + 1}/{max_attempts}")
-            
-            # Shutdown current connection
-            mt5.shutdown()
-            time.sleep(2)
-            
-            # Try to reconnect
-            if self._initialize_mt5():
-                self.logger.info("MT5 reconnection successful")
-                return True
+        Takes _mt5_lock only around the MT5 calls themselves, so the other symbol
+        workers keep trading through the waits between attempts.
+        """
+        max_attempts = self._cfg_reconnection_attempts
+        
+        with self._reconnect_lock:
+            # Another worker may have restored the connection while this one waited
+            with self._mt5_lock:
+                if mt5.account_info() is not None:
+                    self.mt5_connected = True
+                    self._last_connection_check = time.monotonic()
+                    return True
             
-            # Wait before next attempt
-            time.sleep(5 * (attempt + 1))  # Exponential backoff
+            for attempt in range(max_attempts):
+                self.logger.info(f"Reconnection attempt {attempt + 1}/{max_attempts}")
+                
+                # Shutdown current connection
+                with self._mt5_lock:
+                    mt5.shutdown()
+                if self._stop_event.wait(2):
+                    return False
+                
+                # Try to reconnect
+                with self._mt5_lock:
+                    reconnected = self._initialize_mt5()
+                if reconnected:
+                    self.logger.info("MT5 reconnection successful")
+                    return True
+                
+                # Wait before next attempt: exponential backoff, jittered so instances
+                # hit by the same outage don't all reconnect in lockstep
+                delay = min(self._cfg_max_delay, self._cfg_base_delay * (1 << attempt)) + random.uniform(0, 1.0)
+                if self._stop_event.wait(delay):
+                    return False
         
         self.logger.error("All MT5 reconnection attempts failed")
         return False
@@ -290,11 +428,31 @@ class SmartRetryExecutor:
             self.logger.error(f"Error getting symbol info for {symbol}: {e}")
             return None
     
+    def _get_symbol_meta(self, symbol: str, symbol_info: Optional[Any] = None) -> Optional[SymbolMeta]:
+        """Get cached static symbol properties, refreshing them from MT5 after SYMBOL_META_TTL"""
+        now = time.monotonic()
+        if symbol_info is None:
+            meta = self._symbol_meta.get(symbol)
+            if meta is not None and now < meta.expires_at:
+                return meta
+            symbol_info = self._get_symbol_info(symbol)
+            if symbol_info is None:
+                return None
+        
+        points_per_pip = 10 if symbol_info.digits in (5, 3) else 1
+        meta = SymbolMeta(
+            symbol_info.point, symbol_info.digits, points_per_pip,
+            symbol_info.point * points_per_pip, symbol_info.volume_min, symbol_info.volume_step,
+            now + SYMBOL_META_TTL
+        )
+        self._symbol_meta[symbol] = meta
+        return meta
+    
     def _calculate_spread(self, symbol: str) -> Optional[float]:
         """Calculate current spread for symbol in pips"""
         try:
-            symbol_info = self._get_symbol_info(symbol)
-            if symbol_info is None:
+            meta = self._get_symbol_meta(symbol)
+            if meta is None:
                 return None
             
             tick = mt5.symbol_info_tick(symbol)
@@ -303,13 +461,7 @@ class SmartRetryExecutor:
                 return None
             
             # Calculate spread in pips
-            point = symbol_info.point
-            if symbol_info.digits == 5 or symbol_info.digits == 3:
-                pip_value = point * 10
-            else:
-                pip_value = point
-            
-            spread_pips = (tick.ask - tick.bid) / pip_value
+            spread_pips = (tick.ask - tick.bid) / meta.pip_value
             return spread_pips
             
         except Exception as e:
@@ -332,13 +484,27 @@ class SmartRetryExecutor:
         if not self._check_mt5_connection():
             return False, RetryReason.MT5_DISCONNECTION, validation_data
         
-        # Get symbol info
+        # Reuse a result from the last few ticks; retry bursts on one symbol would re-run the same queries
+        now = time.monotonic()
+        cached = self._market_check_cache.get(trade_request.symbol)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        
+        result = self._evaluate_market_conditions(trade_request, validation_data)
+        self._market_check_cache[trade_request.symbol] = (now + self._cfg_market_check_ttl, result)
+        return result
+    
+    def _evaluate_market_conditions(self, trade_request: TradeRequest,
+                                    validation_data: Dict) -> tuple[bool, Optional[RetryReason], Dict]:
+        """Run the MT5 market queries behind _check_market_conditions"""
+        # Get symbol info (trade mode and typical spread are live values; refresh the cached statics too)
         symbol_info = self._get_symbol_info(trade_request.symbol)
         if symbol_info is None:
             return False, RetryReason.EXECUTION_FAILURE, validation_data
+        meta = self._get_symbol_meta(trade_request.symbol, symbol_info)
         
         # Check market hours
-        if self.config["market_validation"]["check_market_hours"]:
+        if self._cfg_check_market_hours:
             if symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_DISABLED:
                 validation_data["market_open"] = False
                 return False, RetryReason.MARKET_CLOSED, validation_data
@@ -353,8 +519,8 @@ class SmartRetryExecutor:
         validation_data["spread_pips"] = current_spread
         
         # Calculate maximum allowed spread
-        typical_spread = symbol_info.spread / (10 if symbol_info.digits in [5, 3] else 1)
-        max_spread_multiplier = self.config["market_validation"]["max_spread_multiplier"]
+        typical_spread = symbol_info.spread / meta.points_per_pip
+        max_spread_multiplier = self._cfg_max_spread_multiplier
         max_allowed_spread = typical_spread * max_spread_multiplier
         validation_data["max_allowed_spread"] = max_allowed_spread
         
@@ -368,12 +534,59 @@ class SmartRetryExecutor:
                 free_margin_percent = (account_info.margin_free / account_info.equity) * 100
                 validation_data["free_margin_percent"] = free_margin_percent
                 
-                min_margin = self.config["market_validation"]["min_free_margin_percent"]
+                min_margin = self._cfg_min_free_margin_percent
                 if free_margin_percent < min_margin:
                     return False, RetryReason.INSUFFICIENT_MARGIN, validation_data
         
         return True, None, validation_data
     
+    def _order_request(self) -> Dict:
+        """The calling thread's order_send request dict, created once with the fixed fields"""
+        request = getattr(self._order_local, "request", None)
+        if request is None:
+            request = self._order_local.request = {
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+            }
+        return request
+    
+    def _order_legs(self, trade_request: TradeRequest, meta: SymbolMeta) -> List[tuple]:
+        """(take_profit, volume) for each order to send for the trade.
+        
+        Leg volumes are whole multiples of the symbol's volume step, at least its
+        minimum volume, and always add up to lot_size. Given volumes that don't
+        meet that are replaced by an even split; a lot too small to split goes out
+        as a single order at the first take profit.
+        """
+        take_profits = trade_request.take_profits
+        if not take_profits:
+            return [(trade_request.take_profit, trade_request.lot_size)]
+        
+        step = meta.volume_step
+        min_steps = math.ceil(meta.volume_min / step - 1e-9)
+        total_steps = math.floor(trade_request.lot_size / step + 1e-9)
+        
+        # Volumes from the user settings (or left over from a partial fill), if usable
+        volumes = trade_request.split_volumes
+        if volumes:
+            leg_steps = [round(volume / step) for volume in volumes]
+            if (len(volumes) == len(take_profits)
+                    and sum(leg_steps) == total_steps
+                    and all(steps >= min_steps and abs(volume - steps * step) < step * 1e-6
+                            for volume, steps in zip(volumes, leg_steps))):
+                return list(zip(take_profits, volumes))
+            self.logger.warning(f"Ignoring TP volumes {volumes} for {trade_request.symbol}: "
+                                f"they must be {len(take_profits)} multiples of {step} "
+                                f"(min {meta.volume_min}) adding up to {trade_request.lot_size}")
+        
+        # Even split floored to the step, with the remainder on the first leg
+        per_leg = total_steps // len(take_profits)
+        if per_leg < max(min_steps, 1):
+            return [(take_profits[0], trade_request.lot_size)]
+        leg_steps = [per_leg] * len(take_profits)
+        leg_steps[0] += total_steps - per_leg * len(take_profits)
+        return [(tp, round(steps * step, 8)) for tp, steps in zip(take_profits, leg_steps)]
+    
     def _execute_trade(self, trade_request: TradeRequest) -> tuple[bool, Optional[str], Dict]:
         """
         Execute trade in MT5
@@ -381,6 +594,7 @@ class SmartRetryExecutor:
         """
         execution_data = {
             "order_ticket": None,
+            "order_tickets": [],
             "execution_price": None,
             "slippage_pips": None,
             "execution_time": None
@@ -390,8 +604,8 @@ class SmartRetryExecutor:
             start_time = time.time()
             
             # Prepare order request
-            symbol_info = self._get_symbol_info(trade_request.symbol)
-            if symbol_info is None:
+            meta = self._get_symbol_meta(trade_request.symbol)
+            if meta is None:
                 return False, "Symbol info unavailable", execution_data
             
             # Get current prices
@@ -399,69 +613,70 @@ class SmartRetryExecutor:
             if tick is None:
                 return False, "Tick data unavailable", execution_data
             
-            # Determine order type and price
-            if trade_request.order_type.lower() == "market":
-                if trade_request.action.lower() == "buy":
-                    price = tick.ask
-                    order_type = mt5.ORDER_TYPE_BUY
-                else:
-                    price = tick.bid
-                    order_type = mt5.ORDER_TYPE_SELL
-            elif trade_request.order_type.lower() == "limit":
-                price = trade_request.entry_price
-                order_type = mt5.ORDER_TYPE_BUY_LIMIT if trade_request.action.lower() == "buy" else mt5.ORDER_TYPE_SELL_LIMIT
-            else:  # stop order
+            # Determine price: market orders fill at the current quote, pending orders at the entry
+            if trade_request.is_market:
+                price = tick.ask if trade_request.is_buy else tick.bid
+            else:
                 price = trade_request.entry_price
-                order_type = mt5.ORDER_TYPE_BUY_STOP if trade_request.action.lower() == "buy" else mt5.ORDER_TYPE_SELL_STOP
             
-            # Prepare request
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL if trade_request.order_type.lower() == "market" else mt5.TRADE_ACTION_PENDING,
-                "symbol": trade_request.symbol,
-                "volume": trade_request.lot_size,
-                "type": order_type,
-                "price": price,
-                "deviation": trade_request.deviation,
-                "magic": trade_request.magic_number,
-                "comment": trade_request.comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
+            # Prepare request (this thread's reusable dict, overwritten field by field)
+            request = self._order_request()
+            request["action"] = mt5.TRADE_ACTION_DEAL if trade_request.is_market else mt5.TRADE_ACTION_PENDING
+            request["symbol"] = trade_request.symbol
+            request["type"] = trade_request.mt5_order_type
+            request["price"] = price
+            request["deviation"] = trade_request.deviation
+            request["magic"] = trade_request.magic_number
+            request["comment"] = trade_request.comment
             
             # Add stops if provided
             if trade_request.stop_loss:
                 request["sl"] = trade_request.stop_loss
-            if trade_request.take_profit:
-                request["tp"] = trade_request.take_profit
-            
-            # Send order
-            result = mt5.order_send(request)
-            execution_time = time.time() - start_time
-            execution_data["execution_time"] = execution_time
-            
-            if result is None:
-                return False, "Order send failed - no result", execution_data
+            else:
+                request.pop("sl", None)
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                error_msg = f"Order failed: {result.retcode} - {result.comment if hasattr(result, 'comment') else 'Unknown error'}"
-                return False, error_msg, execution_data
+            # Send one order per leg against the same tick; only tp and volume change between them
+            legs = self._order_legs(trade_request, meta)
+            for leg, (take_profit, volume) in enumerate(legs):
+                request["volume"] = volume
+                if take_profit:
+                    request["tp"] = take_profit
+                else:
+                    request.pop("tp", None)
+                
+                result = mt5.order_send(request)
+                execution_data["execution_time"] = time.time() - start_time
+                
+                if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                    if result is None:
+                        error_msg = "Order send failed - no result"
+                    else:
+                        error_msg = f"Order failed: {result.retcode} - {result.comment if hasattr(result, 'comment') else 'Unknown error'}"
+                    if leg:
+                        # Keep only the unsent legs, so the retry doesn't duplicate the filled ones
+                        trade_request.take_profits = [tp for tp, _ in legs[leg:]]
+                        trade_request.split_volumes = [vol for _, vol in legs[leg:]]
+                        trade_request.lot_size = round(sum(trade_request.split_volumes), 8)
+                        error_msg = f"{error_msg} (take profit {leg + 1} of {len(legs)})"
+                    return False, error_msg, execution_data
+                
+                execution_data["order_tickets"].append(result.order)
             
             # Calculate slippage
             if hasattr(result, 'price') and trade_request.entry_price:
-                point = symbol_info.point
-                pip_value = point * 10 if symbol_info.digits in [5, 3] else point
-                slippage_pips = abs(result.price - trade_request.entry_price) / pip_value
+                slippage_pips = abs(result.price - trade_request.entry_price) / meta.pip_value
                 execution_data["slippage_pips"] = slippage_pips
                 
                 # Check if slippage exceeds threshold
-                slippage_threshold = self.config["market_validation"]["slippage_threshold_pips"]
+                slippage_threshold = self._cfg_slippage_threshold
                 if slippage_pips > slippage_threshold:
                     self.logger.warning(f"High slippage detected: {slippage_pips:.2f} pips (threshold: {slippage_threshold})")
             
-            execution_data["order_ticket"] = result.order
+            execution_data["order_ticket"] = execution_data["order_tickets"][0]
             execution_data["execution_price"] = result.price if hasattr(result, 'price') else None
             
-            self.logger.info(f"Trade executed successfully: {trade_request.symbol} {trade_request.action} {trade_request.lot_size} lots")
+            self.logger.info(f"Trade executed successfully: {trade_request.symbol} {trade_request.action} {trade_request.lot_size} lots"
+                             f" in {len(legs)} order(s)")
             return True, None, execution_data
             
         except Exception as e:
@@ -471,14 +686,9 @@ class SmartRetryExecutor:
     
     def _calculate_retry_delay(self, attempt_number: int) -> float:
         """Calculate delay before retry attempt"""
-        base_delay = self.config["retry_settings"]["base_delay_seconds"]
-        max_delay = self.config["retry_settings"]["max_delay_seconds"]
-        
-        if self.config["retry_settings"]["exponential_backoff"]:
-            delay = base_delay * (2 ** attempt_number)
-            return min(delay, max_delay)
-        else:
-            return base_delay
+        if self._cfg_exponential_backoff:
+            return min(self._cfg_base_delay * (1 << attempt_number), self._cfg_max_delay)
+        return self._cfg_base_delay
     
     def _log_retry_attempt(self, trade_request: TradeRequest, reason: RetryReason, 
                           spread_before: float, spread_after: float, 
@@ -491,33 +701,57 @@ class SmartRetryExecutor:
             timestamp=datetime.now(),
             spread_before=spread_before,
             spread_after=spread_after,
-            slippage_threshold=self.config["market_validation"]["slippage_threshold_pips"],
+            slippage_threshold=self._cfg_slippage_threshold,
             success=success,
             error_message=error_message
         )
         
-        self.retry_attempts.append(attempt)
+        with self._stats_lock:
+            if len(self.retry_attempts) == self.retry_attempts.maxlen:
+                self._update_stats(self.retry_attempts[0], -1)
+            self.retry_attempts.append(attempt)
+            self._update_stats(attempt, 1)
+            self.total_retry_attempts += 1
         
-        # Log to file
-        log_entry = json.dumps(attempt.to_dict())
-        self.logger.info(f"RETRY_ATTEMPT: {log_entry}")
+        # Log to file (orjson serializes the dataclass directly, without the to_dict() copy)
+        if self.logger.isEnabledFor(logging.INFO):
+            if orjson is not None:
+                log_entry = orjson.dumps(attempt).decode()
+            else:
+                log_entry = json.dumps(attempt.to_dict())
+            self.logger.info("RETRY_ATTEMPT: %s", log_entry)
+    
+    def _update_stats(self, attempt: RetryAttempt, sign: int):
+        """Add (sign=1) or remove (sign=-1) an attempt from the running statistics"""
+        self._stats_successes += sign * attempt.success
+        self._stats_spread_before += sign * (attempt.spread_before or 0)
+        self._stats_spread_after += sign * (attempt.spread_after or 0)
+        reason = attempt.reason.value
+        count = self._stats_reasons.get(reason, 0) + sign
+        if count:
+            self._stats_reasons[reason] = count
+        else:
+            del self._stats_reasons[reason]
     
     def _process_trade_with_retry(self, trade_request: TradeRequest):
         """Process a single trade with retry logic"""
-        original_spread = self._calculate_spread(trade_request.symbol) or 0
+        with self._mt5_lock:
+            original_spread = self._calculate_spread(trade_request.symbol) or 0
+        
+        # The retry window runs from the signal's timestamp; track it on the monotonic clock
+        signal_age = (datetime.now() - trade_request.timestamp).total_seconds()
+        retry_deadline = time.monotonic() + self._cfg_retry_window - signal_age
         
         while trade_request.retry_count <= trade_request.max_retries:
             # Check if we're within retry window
-            retry_window = self.config["retry_settings"]["retry_window_seconds"]
-            time_elapsed = (datetime.now() - trade_request.timestamp).total_seconds()
-            
-            if time_elapsed > retry_window:
+            if time.monotonic() > retry_deadline:
                 self.logger.warning(f"Trade retry window expired for {trade_request.symbol}")
-                self.failed_trades.append(trade_request)
+                self._record_failed_trade(trade_request)
                 return
             
             # Check market conditions
-            conditions_valid, retry_reason, validation_data = self._check_market_conditions(trade_request)
+            with self._mt5_lock:
+                conditions_valid, retry_reason, validation_data = self._check_market_conditions(trade_request)
             
             if not conditions_valid:
                 current_spread = validation_data.get("spread_pips", 0)
@@ -532,7 +766,9 @@ class SmartRetryExecutor:
                         trade_request.retry_count += 1
                         if trade_request.retry_count <= trade_request.max_retries:
                             delay = self._calculate_retry_delay(trade_request.retry_count)
-                            time.sleep(delay)
+                            if self._stop_event.wait(delay):
+                                self._abandon_trade(trade_request)
+                                return
                         continue
                 
                 # For other issues, wait and retry
@@ -540,11 +776,14 @@ class SmartRetryExecutor:
                 if trade_request.retry_count <= trade_request.max_retries:
                     delay = self._calculate_retry_delay(trade_request.retry_count)
                     self.logger.info(f"Retrying trade in {delay} seconds (attempt {trade_request.retry_count})")
-                    time.sleep(delay)
+                    if self._stop_event.wait(delay):
+                        self._abandon_trade(trade_request)
+                        return
                 continue
             
             # Attempt trade execution
-            success, error_message, execution_data = self._execute_trade(trade_request)
+            with self._mt5_lock:
+                success, error_message, execution_data = self._execute_trade(trade_request)
             current_spread = validation_data.get("spread_pips", 0)
             
             if success:
@@ -564,51 +803,94 @@ class SmartRetryExecutor:
                 if trade_request.retry_count <= trade_request.max_retries:
                     delay = self._calculate_retry_delay(trade_request.retry_count)
                     self.logger.info(f"Trade execution failed, retrying in {delay} seconds: {error_message}")
-                    time.sleep(delay)
+                    if self._stop_event.wait(delay):
+                        self._abandon_trade(trade_request)
+                        return
                 else:
                     self.logger.error(f"Trade failed after {trade_request.max_retries} retries: {error_message}")
-                    self.failed_trades.append(trade_request)
+                    self._record_failed_trade(trade_request)
                     return
         
         # If we get here, all retries exhausted
-        self.failed_trades.append(trade_request)
-    
-    def _process_queue(self):
-        """Main processing loop for trade queue"""
-        while self.is_running:
-            try:
-                # Get trade request from queue with timeout
-                trade_request = self.trade_queue.get(timeout=1)
-                
-                self.logger.info(f"Processing trade: {trade_request.symbol} {trade_request.action} {trade_request.lot_size}")
-                
-                # Process trade with retry logic
-                self._process_trade_with_retry(trade_request)
-                
-                # Mark task as done
-                self.trade_queue.task_done()
-                
-            except Empty:
-                # Timeout - continue loop
-                continue
-            except Exception as e:
-                self.logger.error(f"Error processing trade queue: {e}")
+        self._record_failed_trade(trade_request)
+    
+    def _record_failed_trade(self, trade_request: TradeRequest):
+        """Keep a failed trade in memory, writing out the oldest one if the buffer is full"""
+        with self._failed_trades_lock:
+            if len(self.failed_trades) == self.failed_trades.maxlen:
+                self._write_evicted_trade(self.failed_trades[0])
+            self.failed_trades.append(trade_request)
+    
+    def _write_evicted_trade(self, trade_request: TradeRequest):
+        """Append a failed trade to the failed trades file"""
+        try:
+            if orjson is not None:
+                line = orjson.dumps(trade_request.to_dict()).decode()
+            else:
+                line = json.dumps(trade_request.to_dict())
+            with open(self._failed_trades_file, 'a') as f:
+                f.write(line + "\n")
+        except Exception as e:
+            self.logger.error(f"Error writing evicted failed trade: {e}")
+    
+    def _abandon_trade(self, trade_request: TradeRequest):
+        """Record a trade dropped because processing was stopped"""
+        self.logger.warning(f"Trade abandoned on shutdown: {trade_request.symbol} {trade_request.action}")
+        self._record_failed_trade(trade_request)
+    
+    def _process_queue(self, shard: _SymbolShard):
+        """Processing loop for one symbol's trade queue"""
+        while not self._stop_event.is_set():
+            # Wait for trades, then take everything queued so far in one go
+            if not shard.event.wait(timeout=1) or self._stop_event.is_set():
                 continue
+            shard.event.clear()
+            
+            batch = []
+            while shard.queue:
+                batch.append(shard.queue.popleft())
+            
+            for i, trade_request in enumerate(batch):
+                if self._stop_event.is_set():
+                    # Put back what this batch didn't reach; shutdown accounts for it
+                    shard.queue.extendleft(reversed(batch[i:]))
+                    break
+                try:
+                    self.logger.info(f"Processing trade: {trade_request.symbol} {trade_request.action} {trade_request.lot_size}")
+                    
+                    # Process trade with retry logic
+                    self._process_trade_with_retry(trade_request)
+                    
+                except Exception as e:
+                    self.logger.error(f"Error processing trade queue: {e}")
+    
+    def _start_worker(self, symbol: str, shard: _SymbolShard):
+        """Start the worker thread for a symbol's queue"""
+        shard.thread = threading.Thread(target=self._process_queue, args=(shard,), name=f"retry-{symbol}", daemon=True)
+        shard.thread.start()
     
     def start_processing(self):
-        """Start the trade processing thread"""
-        if self.processing_thread is None or not self.processing_thread.is_alive():
+        """Start the trade processing threads"""
+        with self._shards_lock:
+            self._stop_event.clear()
             self.is_running = True
-            self.processing_thread = threading.Thread(target=self._process_queue, daemon=True)
-            self.processing_thread.start()
-            self.logger.info("Trade processing thread started")
+            for symbol, shard in self._shards.items():
+                if shard.thread is None or not shard.thread.is_alive():
+                    self._start_worker(symbol, shard)
+        self.logger.info("Trade processing started")
     
     def stop_processing(self):
-        """Stop the trade processing thread"""
+        """Stop the trade processing threads"""
         self.is_running = False
-        if self.processing_thread and self.processing_thread.is_alive():
-            self.processing_thread.join(timeout=5)
-            self.logger.info("Trade processing thread stopped")
+        self._stop_event.set()
+        shards = list(self._shards.values())
+        for shard in shards:
+            shard.event.set()
+        workers = [shard.thread for shard in shards if shard.thread and shard.thread.is_alive()]
+        for thread in workers:
+            thread.join(timeout=5)
+        if workers:
+            self.logger.info("Trade processing threads stopped")
     
     def add_trade(self, trade_request: TradeRequest) -> bool:
         """
@@ -618,9 +900,28 @@ class SmartRetryExecutor:
         try:
             # Set max retries from config if not specified
             if trade_request.max_retries == 3:  # Default value
-                trade_request.max_retries = self.config["retry_settings"]["max_retries"]
+                trade_request.max_retries = self._cfg_max_retries
+            
+            # Parse order kind and direction once, up front
+            kind = trade_request.order_type.lower()
+            if kind not in ("market", "limit"):
+                kind = "stop"
+            trade_request.is_buy = trade_request.action.lower() == "buy"
+            trade_request.is_market = kind == "market"
+            trade_request.mt5_order_type = ORDER_TYPES[kind, trade_request.is_buy]
             
-            self.trade_queue.put(trade_request)
+            shard = self._shards.get(trade_request.symbol)
+            if shard is None:
+                with self._shards_lock:
+                    shard = self._shards.get(trade_request.symbol)
+                    if shard is None:
+                        shard = _SymbolShard(queue=deque(), event=threading.Event())
+                        if self.is_running:
+                            self._start_worker(trade_request.symbol, shard)
+                        self._shards[trade_request.symbol] = shard
+            
+            shard.queue.append(trade_request)
+            shard.event.set()
             self.logger.info(f"Trade added to queue: {trade_request.symbol} {trade_request.action}")
             return True
             
@@ -631,32 +932,27 @@ class SmartRetryExecutor:
     def get_queue_status(self) -> Dict:
         """Get current queue status and statistics"""
         return {
-            "queue_size": self.trade_queue.qsize(),
+            "queue_size": sum(len(shard.queue) for shard in list(self._shards.values())),
             "is_processing": self.is_running,
             "mt5_connected": self.mt5_connected,
-            "total_retry_attempts": len(self.retry_attempts),
+            "total_retry_attempts": self.total_retry_attempts,
             "failed_trades": len(self.failed_trades),
-            "last_connection_check": self.last_connection_check.isoformat()
+            "last_connection_check": (
+                datetime.now() - timedelta(seconds=time.monotonic() - self._last_connection_check)
+            ).isoformat()
         }
     
     def get_retry_statistics(self) -> Dict:
         """Get detailed retry statistics"""
-        if not self.retry_attempts:
-            return {"no_data": True}
-        
-        # Calculate statistics
-        total_attempts = len(self.retry_attempts)
-        successful_retries = sum(1 for attempt in self.retry_attempts if attempt.success)
-        
-        # Group by reason
-        reason_counts = {}
-        for attempt in self.retry_attempts:
-            reason = attempt.reason.value
-            reason_counts[reason] = reason_counts.get(reason, 0) + 1
-        
-        # Average spreads
-        avg_spread_before = sum(attempt.spread_before for attempt in self.retry_attempts) / total_attempts
-        avg_spread_after = sum(attempt.spread_after for attempt in self.retry_attempts) / total_attempts
+        # Read the running aggregates kept by _log_retry_attempt
+        with self._stats_lock:
+            total_attempts = len(self.retry_attempts)
+            if not total_attempts:
+                return {"no_data": True}
+            successful_retries = self._stats_successes
+            reason_counts = dict(self._stats_reasons)
+            avg_spread_before = self._stats_spread_before / total_attempts
+            avg_spread_after = self._stats_spread_after / total_attempts
         
         return {
             "total_retry_attempts": total_attempts,
@@ -676,12 +972,12 @@ class SmartRetryExecutor:
     def shutdown(self):
         """Shutdown the retry executor"""
         self.logger.info("Shutting down SmartRetryExecutor")
-        self.stop_processing()
         
-        # Wait for queue to empty
-        if not self.trade_queue.empty():
-            self.logger.info("Waiting for trade queue to empty...")
-            self.trade_queue.join()
+        # Stop at once, interrupting any retry backoff; trades not yet executed are recorded as failed
+        self.stop_processing()
+        for shard in list(self._shards.values()):
+            while shard.queue:
+                self._abandon_trade(shard.queue.popleft())
         
         # Shutdown MT5
         mt5.shutdown()
@@ -691,6 +987,11 @@ class SmartRetryExecutor:
 # Example usage and helper functions
 def create_trade_request_from_signal(signal_data: Dict, user_settings: Dict) -> TradeRequest:
     """Create TradeRequest from parsed signal data"""
+    # Signals with several take profits become one order per TP; the lot is split evenly in
+    # the symbol's volume steps unless the user settings give the per-TP volumes
+    take_profits = [tp for tp in signal_data.get("tp") or [] if tp]
+    if len(take_profits) < 2:
+        take_profits = []
     return TradeRequest(
         symbol=signal_data.get("pair", ""),
         action=signal_data.get("action", ""),
@@ -704,7 +1005,9 @@ def create_trade_request_from_signal(signal_data: Dict, user_settings: Dict) ->
         comment=f"Signal_{signal_data.get('signalId', 'unknown')}",
         timestamp=datetime.now(),
         original_signal_id=signal_data.get("signalId"),
-        user_id=user_settings.get("user_id")
+        user_id=user_settings.get("user_id"),
+        take_profits=take_profits,
+        split_volumes=list(user_settings.get("tp_volumes") or [])
     )
 
 
@@ -8,6 +8,11 @@ import asyncio
 from datetime import datetime
 from strategy_runtime import StrategyEngine, SignalPayload
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class IntegratedTradingSystem:
     """
     Example integration showing complete signal-to-trade flow
@@ -21,8 +26,14 @@ class IntegratedTradingSystem:
     def load_visual_strategy(self, strategy_file_path: str):
         """Load visual strategy from StrategyBuilder export"""
         try:
-            with open(strategy_file_path, 'r') as f:
-                strategy = json.load(f)
+            if orjson is not None:
+                with open(strategy_file_path, 'rb') as f:
+                    strategy = orjson.loads(f.read())
+            else:
+                with open(strategy_file_path, 'r') as f:
+                    strategy = json.load(f)
+            # Index and compile the rules now rather than on the first signal
+            self.strategy_engine.load_strategy(strategy)
             self.active_strategies.append(strategy)
             print(f"Loaded strategy: {strategy['name']}")
             return True
@@ -53,9 +64,9 @@ class IntegratedTradingSystem:
             # Execute strategy engine
             result_payload = self.strategy_engine.execute_strategy(parsed_signal, strategy)
             
-            # Get execution summary
-            summary = self.strategy_engine.get_execution_summary()
-            print(f"Rules executed: {summary['total_rules_executed']}")
+            # Get execution counts (the full timeline isn't needed here)
+            counts = self.strategy_engine.get_counts()
+            print(f"Rules executed: {counts['total_rules_executed']}")
             print(f"Strategy actions: {result_payload.strategy_actions}")
             print(f"Execution allowed: {result_payload.execution_allowed}")
             
@@ -72,6 +83,35 @@ class IntegratedTradingSystem:
             
         return final_payload
     
+    async def process_batch(self, raw_signals: list):
+        """
+        Process several (raw_signal_text, channel_name) signals together, applying
+        each active strategy to the whole batch at once
+        """
+        print(f"\n=== Processing batch of {len(raw_signals)} signals ===")
+        
+        parsed_signals = [self.mock_signal_parser(raw_signal_text) for raw_signal_text, _ in raw_signals]
+        
+        final_payloads = [None] * len(parsed_signals)
+        for strategy in self.active_strategies:
+            print(f"\nApplying strategy: {strategy['name']}")
+            
+            final_payloads = self.strategy_engine.execute_batch(parsed_signals, strategy)
+            
+            counts = self.strategy_engine.get_counts()
+            print(f"Rules executed: {counts['total_rules_executed']}")
+            
+            # Clear for next strategy
+            self.strategy_engine.clear_execution_history()
+        
+        for (_, channel_name), payload in zip(raw_signals, final_payloads):
+            if payload and payload.execution_allowed:
+                await self.execute_trade(payload)
+            else:
+                print(f"Trade execution blocked by strategy ({channel_name})")
+        
+        return final_payloads
+    
     def mock_signal_parser(self, raw_text: str) -> dict:
         """Mock signal parser - replace with actual parser"""
         # Simple keyword-based parsing for demo
@@ -4,22 +4,34 @@ Executes strategy logic based on visual rule structures from StrategyBuilder.
 Supports logic chaining and returns modified signal payloads for trade execution.
 """
 
+import sys
 import json
+import time
+import queue
+import atexit
 import logging
+import operator
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
+from collections import deque
 from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('strategy_runtime.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: records are queued and written by a background listener,
+# so rule execution doesn't wait on file/console writes
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler('strategy_runtime.log'), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # the listener's handlers apply the full format
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
 class RuleType(Enum):
@@ -35,7 +47,40 @@ class ComparisonOperator(Enum):
     LESS_EQUAL = "<="
     GREATER_EQUAL = ">="
 
-@dataclass
+# __slots__-backed dataclasses where supported (Python 3.10+); plain dataclasses otherwise
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Wall clock minus monotonic clock, for turning RuleExecution's monotonic timestamps into datetimes
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+# How many loaded strategies StrategyEngine keeps indexed and compiled
+STRATEGY_CACHE_SIZE = 32
+
+# Comparison function per operator, looked up once when a strategy is loaded
+_OPS = {
+    ComparisonOperator.LESS_THAN.value: operator.lt,
+    ComparisonOperator.GREATER_THAN.value: operator.gt,
+    ComparisonOperator.EQUALS.value: operator.eq,
+    ComparisonOperator.NOT_EQUALS.value: operator.ne,
+    ComparisonOperator.LESS_EQUAL.value: operator.le,
+    ComparisonOperator.GREATER_EQUAL.value: operator.ge,
+}
+
+# Numeric payload fields a condition can test, and how to read them (see _get_payload_value)
+_NUMERIC_FIELD_GETTERS = {
+    'confidence': operator.attrgetter('confidence'),
+    'entry': operator.attrgetter('entry'),
+    'sl': lambda payload: payload.sl or 0,
+    'tp': lambda payload: payload.tp or 0,
+    'risk': lambda payload: payload.lot_size * 10000,  # Convert lot to risk units
+    'lot_size': operator.attrgetter('lot_size'),
+}
+
+# Every payload field a condition can test; unknown fields read as 0
+_FIELD_GETTERS = {**_NUMERIC_FIELD_GETTERS, 'pair': operator.attrgetter('pair')}
+_ZERO = lambda payload: 0
+
+@dataclass(**DATACLASS_SLOTS)
 class SignalPayload:
     """Modified signal payload for trade execution"""
     pair: str
@@ -52,20 +97,46 @@ class SignalPayload:
     def __post_init__(self):
         if self.strategy_actions is None:
             self.strategy_actions = []
+    
+    def to_dict(self) -> Dict:
+        """Convert payload to dictionary (a flat copy, unlike dataclasses.asdict)"""
+        return {
+            'pair': self.pair,
+            'action': self.action,
+            'entry': self.entry,
+            'sl': self.sl,
+            'tp': self.tp,
+            'lot_size': self.lot_size,
+            'confidence': self.confidence,
+            'modified_by_strategy': self.modified_by_strategy,
+            'strategy_actions': list(self.strategy_actions),
+            'execution_allowed': self.execution_allowed
+        }
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RuleExecution:
     """Track rule execution results"""
     rule_id: str
     rule_type: str
     executed: bool
     result: Any
-    timestamp: datetime
+    timestamp_ns: int  # time.monotonic_ns() when the rule ran
     next_rules: List[str] = None
     
     def __post_init__(self):
         if self.next_rules is None:
             self.next_rules = []
+    
+    def to_dict(self) -> Dict:
+        """Convert execution record to dictionary"""
+        return {
+            'rule_id': self.rule_id,
+            'rule_type': self.rule_type,
+            'executed': self.executed,
+            'result': self.result,
+            'timestamp': datetime.fromtimestamp((_WALL_CLOCK_OFFSET_NS + self.timestamp_ns) / 1e9),
+            'next_rules': list(self.next_rules)
+        }
 
 class StrategyEngine:
     """
@@ -78,6 +149,13 @@ class StrategyEngine:
         self.current_payload: Optional[SignalPayload] = None
         self.strategy_rules: Dict[str, Any] = {}
         self.rule_connections: Dict[str, List[str]] = {}
+        # Built by _load_strategy_rules: the trigger rules, and each rule resolved to
+        # (rule_type, handler, config, next_rules) so execution skips the type dispatch
+        self._trigger_rules: List[Dict] = []
+        self._compiled_rules: Dict[str, tuple] = {}
+        # id(user_strategy) -> (strategy, shape, (strategy_rules, rule_connections, triggers, compiled rules)).
+        # Holding the strategy keeps its id from being reused while cached
+        self._strategy_cache: Dict[int, tuple] = {}
         
         logger.info("StrategyEngine initialized")
     
@@ -99,13 +177,13 @@ class StrategyEngine:
             # Load strategy configuration
             self._load_strategy_rules(user_strategy)
             
-            # Execute strategy chain starting from triggers
-            trigger_rules = self._find_trigger_rules()
-            
-            for trigger_rule in trigger_rules:
+            # Execute strategy chain starting from triggers; a rule reachable along
+            # several paths (or from several triggers) runs once per signal
+            executed = set()
+            for trigger_rule in self._trigger_rules:
                 if self._should_execute_trigger(trigger_rule, parsed_signal):
                     logger.info(f"Executing trigger: {trigger_rule['id']}")
-                    self._execute_rule_chain(trigger_rule['id'])
+                    self._execute_rule_chain(trigger_rule['id'], executed)
             
             # Log final execution state
             logger.info(f"Strategy execution completed. Modified: {self.current_payload.modified_by_strategy}")
@@ -118,6 +196,39 @@ class StrategyEngine:
             # Return original payload on error
             return self._create_signal_payload(parsed_signal)
     
+    def execute_batch(self, parsed_signals: List[Dict], user_strategy: Dict) -> List[SignalPayload]:
+        """
+        Process several signals through one strategy.
+        
+        The strategy is loaded once for the whole batch; signals that fire none of its
+        triggers get their unmodified payload without entering the rule chain.
+        
+        Returns:
+            One SignalPayload per signal, in order
+        """
+        try:
+            self._load_strategy_rules(user_strategy)
+        except Exception as e:
+            logger.error(f"Strategy execution failed: {e}")
+            return [self._create_signal_payload(parsed_signal) for parsed_signal in parsed_signals]
+        
+        payloads = []
+        for parsed_signal in parsed_signals:
+            if any(self._should_execute_trigger(trigger_rule, parsed_signal) for trigger_rule in self._trigger_rules):
+                payloads.append(self.execute_strategy(parsed_signal, user_strategy))
+            else:
+                self.current_payload = self._create_signal_payload(parsed_signal)
+                payloads.append(self.current_payload)
+        return payloads
+    
+    def load_strategy(self, user_strategy: Dict):
+        """
+        Index and compile a strategy ahead of its first signal.
+        
+        Later execute_strategy calls with the same dict reuse the compiled form.
+        """
+        self._load_strategy_rules(user_strategy)
+    
     def _create_signal_payload(self, parsed_signal: Dict) -> SignalPayload:
         """Create SignalPayload from parsed signal"""
         return SignalPayload(
@@ -132,6 +243,14 @@ class StrategyEngine:
     
     def _load_strategy_rules(self, user_strategy: Dict):
         """Load and index strategy rules from visual builder"""
+        # The same strategy dict is normally applied to many signals; reuse its index unless
+        # rules or connections were added or removed since
+        shape = (len(user_strategy.get('rules', [])), len(user_strategy.get('connections', [])))
+        cached = self._strategy_cache.get(id(user_strategy))
+        if cached is not None and cached[0] is user_strategy and cached[1] == shape:
+            self.strategy_rules, self.rule_connections, self._trigger_rules, self._compiled_rules = cached[2]
+            return
+        
         self.strategy_rules = {}
         self.rule_connections = {}
         
@@ -149,6 +268,16 @@ class StrategyEngine:
                 self.rule_connections[from_rule] = []
             self.rule_connections[from_rule].append(to_rule)
         
+        self._trigger_rules = self._find_trigger_rules()
+        self._compiled_rules = self._compile_rules()
+        
+        if len(self._strategy_cache) >= STRATEGY_CACHE_SIZE:
+            del self._strategy_cache[next(iter(self._strategy_cache))]
+        self._strategy_cache[id(user_strategy)] = (
+            user_strategy, shape,
+            (self.strategy_rules, self.rule_connections, self._trigger_rules, self._compiled_rules)
+        )
+        
         logger.info(f"Loaded {len(self.strategy_rules)} rules with {len(user_strategy.get('connections', []))} connections")
     
     def _find_trigger_rules(self) -> List[Dict]:
@@ -175,44 +304,91 @@ class StrategyEngine:
         
         return trigger_map.get(trigger_event, False)
     
-    def _execute_rule_chain(self, rule_id: str) -> bool:
-        """Execute a rule and its connected downstream rules"""
-        if rule_id not in self.strategy_rules:
-            logger.warning(f"Rule {rule_id} not found")
-            return False
-        
-        rule = self.strategy_rules[rule_id]
-        rule_config = rule['config']
-        rule_type = rule_config['type']
-        
-        logger.info(f"Executing rule {rule_id} of type {rule_type}")
-        
-        # Execute based on rule type
-        execution_result = None
-        
-        if rule_type == RuleType.TRIGGER.value:
-            execution_result = self._execute_trigger(rule_config)
-        elif rule_type == RuleType.CONDITION.value:
-            execution_result = self._execute_condition(rule_config)
-        elif rule_type == RuleType.ACTION.value:
-            execution_result = self._execute_action(rule_config)
+    def _compile_rules(self) -> Dict[str, tuple]:
+        """Resolve every rule's handler and config once, for _execute_rule_chain"""
+        handlers = {
+            RuleType.TRIGGER.value: self._execute_trigger,
+            RuleType.CONDITION.value: self._execute_condition,
+            RuleType.ACTION.value: self._execute_action,
+        }
+        compiled_rules = {}
+        for rule_id, rule in self.strategy_rules.items():
+            rule_config = rule['config']
+            rule_type = rule_config['type']
+            handler = handlers.get(rule_type)
+            
+            if rule_type == RuleType.CONDITION.value:
+                compiled = self._compile_condition(rule_config)
+                if compiled is not None:
+                    handler, rule_config = self._execute_compiled_condition, compiled
+            
+            compiled_rules[rule_id] = (rule_type, handler, rule_config, self.rule_connections.get(rule_id, []))
+        return compiled_rules
+    
+    def _compile_condition(self, config: Dict) -> Optional[Dict]:
+        """
+        Pre-resolve a numeric condition's field getter, comparison function and operand.
+        Returns None for conditions left to _execute_condition (text fields, unknown operators).
+        """
+        field = config.get('field', '')
+        op = config.get('operator', '')
+        getter = _NUMERIC_FIELD_GETTERS.get(field)
+        compare = _OPS.get(op)
+        if getter is None or compare is None:
+            return None
         
-        # Record execution
-        self.execution_history.append(RuleExecution(
-            rule_id=rule_id,
-            rule_type=rule_type,
-            executed=True,
-            result=execution_result,
-            timestamp=datetime.now(),
-            next_rules=self.rule_connections.get(rule_id, [])
-        ))
+        value = config.get('value', '')
+        try:
+            operand = float(value)
+        except (ValueError, TypeError):
+            operand = 0.0
         
-        # Execute connected rules if condition passed or action completed
-        if execution_result and rule_id in self.rule_connections:
-            for next_rule_id in self.rule_connections[rule_id]:
-                self._execute_rule_chain(next_rule_id)
+        return {
+            'field': field,
+            'operator': op,
+            'value': value,
+            '_getter': getter,
+            '_op': compare,
+            '_rhs': operand,
+        }
+    
+    def _execute_rule_chain(self, rule_id: str, executed: set):
+        """
+        Execute a rule and its connected downstream rules, depth first.
         
-        return execution_result
+        Rules already in `executed` are skipped, so shared downstream rules run once
+        and a cyclic graph terminates.
+        """
+        pending = deque([rule_id])
+        while pending:
+            rule_id = pending.pop()
+            if rule_id in executed:
+                continue
+            
+            compiled = self._compiled_rules.get(rule_id)
+            if compiled is None:
+                logger.warning(f"Rule {rule_id} not found")
+                continue
+            rule_type, handler, rule_config, next_rules = compiled
+            executed.add(rule_id)
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Executing rule {rule_id} of type {rule_type}")
+            execution_result = handler(rule_config) if handler is not None else None
+            
+            # Record execution
+            self.execution_history.append(RuleExecution(
+                rule_id=rule_id,
+                rule_type=rule_type,
+                executed=True,
+                result=execution_result,
+                timestamp_ns=time.monotonic_ns(),
+                next_rules=next_rules
+            ))
+            
+            # Execute connected rules if condition passed or action completed
+            if execution_result:
+                pending.extend(reversed(next_rules))
     
     def _execute_trigger(self, config: Dict) -> bool:
         """Execute trigger rule - always returns True if reached"""
@@ -237,6 +413,16 @@ class StrategyEngine:
         
         return result
     
+    def _execute_compiled_condition(self, config: Dict) -> bool:
+        """Execute IF condition rule prepared by _compile_condition"""
+        current_value = config['_getter'](self.current_payload)
+        result = config['_op'](current_value, config['_rhs'])
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Condition: {config['field']} {config['operator']} {config['value']} = {current_value} {config['operator']} {config['_rhs']} = {result}")
+        
+        return result
+    
     def _execute_action(self, config: Dict) -> bool:
         """Execute THEN action rule"""
         action = config.get('action', '')
@@ -282,17 +468,7 @@ class StrategyEngine:
     
     def _get_payload_value(self, field: str) -> Union[float, str, bool]:
         """Get value from current signal payload"""
-        field_map = {
-            'confidence': self.current_payload.confidence,
-            'pair': self.current_payload.pair,
-            'entry': self.current_payload.entry,
-            'sl': self.current_payload.sl or 0,
-            'tp': self.current_payload.tp or 0,
-            'risk': self.current_payload.lot_size * 10000,  # Convert lot to risk units
-            'lot_size': self.current_payload.lot_size
-        }
-        
-        return field_map.get(field, 0)
+        return _FIELD_GETTERS.get(field, _ZERO)(self.current_payload)
     
     def _parse_value(self, value_str: str, current_value: Union[float, str, bool]) -> Union[float, str, bool]:
         """Parse comparison value with type matching"""
@@ -346,19 +522,32 @@ class StrategyEngine:
     
     def get_execution_summary(self) -> Dict:
         """Get summary of strategy execution"""
+        summary = self.get_counts()
+        summary['execution_timeline'] = list(self.iter_timeline())
+        summary['final_payload'] = self.current_payload.to_dict() if self.current_payload else None
+        return summary
+    
+    def get_counts(self) -> Dict:
+        """Get the execution summary without the timeline or payload"""
         return {
             'total_rules_executed': len(self.execution_history),
-            'execution_timeline': [asdict(exec) for exec in self.execution_history],
-            'final_payload': asdict(self.current_payload) if self.current_payload else None,
             'strategy_modified_signal': self.current_payload.modified_by_strategy if self.current_payload else False
         }
     
+    def iter_timeline(self):
+        """Yield the execution records as dictionaries, one at a time"""
+        for record in self.execution_history:
+            yield record.to_dict()
+    
     def clear_execution_history(self):
         """Clear execution history for new strategy run"""
         self.execution_history.clear()
         self.current_payload = None
-        self.strategy_rules.clear()
-        self.rule_connections.clear()
+        # Rebind rather than clear(): the indexes may still be in the strategy cache
+        self.strategy_rules = {}
+        self.rule_connections = {}
+        self._trigger_rules = []
+        self._compiled_rules = {}
 
 
 # Example usage and testing
@@ -4,15 +4,67 @@ Secure Sync Client for Desktop Applications
 Handles authenticated communication with admin panel using HMAC and JWT tokens
 """
 
-import requests
+import httpx
+import asyncio
 import hashlib
 import hmac
 import time
+import os
+import socket
+import signal
 import json
-import uuid
-from typing import Dict, Any, Optional, List
+import gzip
+import base64
+import math
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Sequence
 from config_loader import get_config, get_sync_config, get_system_config
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Request bodies above this size are gzip-compressed before upload
+COMPRESS_MIN_BYTES = 2048
+
+# Endpoint templates for the per-terminal and per-signal calls made every sync cycle
+_EP_TERM_STATUS = '/terminal/{}/status'
+_EP_TERM_CONFIG = '/terminal/{}/config'
+_EP_TERM_METRICS = '/terminal/{}/metrics'
+_EP_SIGNAL_EXECUTION = '/signals/{}/execution'
+
+@lru_cache(maxsize=32)
+def _signature_prefix(method: str, endpoint: str) -> bytes:
+    """Encoded "method|endpoint|" start of a request's signed string"""
+    return f"{method}|{endpoint}|".encode('utf-8')
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated percentile (0 <= q <= 1) of already-sorted samples"""
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize_samples(samples: Dict[str, Sequence[float]]) -> Dict[str, Dict[str, float]]:
+    """Reduce raw samples (one sequence per metric) to count, mean, min, max, p50, p95 and p99"""
+    summary = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        # One sort per metric serves min, max and all three percentiles
+        ordered = sorted(values)
+        summary[name] = {
+            'count': len(ordered),
+            'mean': math.fsum(ordered) / len(ordered),
+            'min': ordered[0],
+            'max': ordered[-1],
+            'p50': _percentile(ordered, 0.50),
+            'p95': _percentile(ordered, 0.95),
+            'p99': _percentile(ordered, 0.99)
+        }
+    return summary
+
 class SecureSyncClient:
     """Secure client for authenticated sync operations with admin panel"""
     
@@ -22,6 +74,18 @@ class SecureSyncClient:
         self.api_key = api_key
         self.api_key_id = api_key_id
         
+        # HMAC keyed once; each signature copies it, so the padded key blocks aren't re-hashed
+        self._signer = hmac.new(api_key.encode('utf-8'), digestmod=hashlib.sha256)
+        self._sig_suffix = f"|{user_id}".encode('utf-8')
+        
+        # Auth headers that are the same on every request
+        self._static_headers = {
+            'Authorization': f'ApiKey {api_key}',
+            'X-User-ID': str(user_id),
+            'X-API-Key-ID': str(api_key_id),
+            'Content-Type': 'application/json'
+        }
+        
         # Load configuration
         self.sync_config = get_sync_config()
         self.system_config = get_system_config()
@@ -29,26 +93,32 @@ class SecureSyncClient:
         self.base_url = self.system_config['api_base_url']
         self.sync_base_url = f"{self.base_url}/api/sync"
         
-        # Session for connection pooling
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': f"TradingSystem-Desktop/{self.system_config['version']}"
-        })
+        # Async client for connection pooling; keep-alive connections are shared by concurrent requests.
+        # The transport retries failed connects with backoff and disables Nagle on its sockets
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_keepalive_connections=4),
+            retries=3,
+            socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+        )
+        self.session = httpx.AsyncClient(
+            headers={'User-Agent': f"TradingSystem-Desktop/{self.system_config['version']}"},
+            transport=transport,
+            timeout=30
+        )
         
         print(f"✓ Secure sync client initialized for user {user_id}")
     
     def _generate_nonce(self) -> str:
         """Generate unique nonce for request"""
-        return str(uuid.uuid4()).replace('-', '')
+        return os.urandom(16).hex()
     
     def _create_signature(self, method: str, endpoint: str, timestamp: int, nonce: str) -> str:
         """Create HMAC signature for request authentication"""
-        data = f"{method}|{endpoint}|{timestamp}|{nonce}|{self.user_id}"
-        return hmac.new(
-            self.api_key.encode('utf-8'),
-            data.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        # Signed string: method|endpoint|timestamp|nonce|user_id
+        data = _signature_prefix(method, endpoint) + f"{timestamp}|{nonce}".encode('ascii') + self._sig_suffix
+        signer = self._signer.copy()
+        signer.update(data)
+        return base64.b64encode(signer.digest()).decode('ascii')
     
     def _create_auth_headers(self, method: str, endpoint: str) -> Dict[str, str]:
         """Create authentication headers for sync request"""
@@ -56,18 +126,14 @@ class SecureSyncClient:
         nonce = self._generate_nonce()
         signature = self._create_signature(method, endpoint, timestamp, nonce)
         
-        return {
-            'Authorization': f'ApiKey {self.api_key}',
-            'X-Timestamp': str(timestamp),
-            'X-Nonce': nonce,
-            'X-User-ID': str(self.user_id),
-            'X-API-Key-ID': str(self.api_key_id),
-            'X-Signature': signature,
-            'Content-Type': 'application/json'
-        }
-    
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
-                     use_sync_auth: bool = True) -> Dict[str, Any]:
+        headers = self._static_headers.copy()
+        headers['X-Timestamp'] = str(timestamp)
+        headers['X-Nonce'] = nonce
+        headers['X-Signature'] = signature
+        return headers
+    
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
+                           use_sync_auth: bool = True) -> Dict[str, Any]:
         """Make authenticated request to admin panel"""
         try:
             # Determine URL and headers
@@ -79,14 +145,23 @@ class SecureSyncClient:
                 headers = {'Content-Type': 'application/json'}
             
             # Make request
-            if method.upper() == 'GET':
-                response = self.session.get(url, headers=headers, timeout=30)
-            elif method.upper() == 'POST':
-                response = self.session.post(url, headers=headers, json=data, timeout=30)
-            elif method.upper() == 'PUT':
-                response = self.session.put(url, headers=headers, json=data, timeout=30)
-            elif method.upper() == 'DELETE':
-                response = self.session.delete(url, headers=headers, timeout=30)
+            if method.upper() in ('GET', 'DELETE'):
+                response = await self.session.request(method.upper(), url, headers=headers)
+            elif method.upper() in ('POST', 'PUT'):
+                if data is not None:
+                    # Content-Type is already in the headers
+                    if orjson is not None:
+                        body = orjson.dumps(data)
+                    else:
+                        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+                    if len(body) > COMPRESS_MIN_BYTES:
+                        # express.json() inflates gzip bodies; the signature does not cover the body
+                        body = gzip.compress(body, compresslevel=5)
+                        headers['Content-Encoding'] = 'gzip'
+                    response = await self.session.request(method.upper(), url, headers=headers,
+                                                          content=body)
+                else:
+                    response = await self.session.request(method.upper(), url, headers=headers, json=data)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -106,97 +181,103 @@ class SecureSyncClient:
                     pass
                 raise Exception(f"Request failed ({response.status_code}): {error_msg}")
             
+            if orjson is not None:
+                return orjson.loads(response.content)
             return response.json()
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise Exception("Request timeout - admin panel may be unavailable")
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError:
             raise Exception("Connection error - cannot reach admin panel")
         except Exception as e:
             raise Exception(f"Sync request failed: {str(e)}")
     
     # Terminal Management Operations
-    def register_terminal(self, terminal_info: Dict[str, Any]) -> Dict[str, Any]:
+    async def register_terminal(self, terminal_info: Dict[str, Any]) -> Dict[str, Any]:
         """Register desktop terminal with admin panel"""
-        return self._make_request('POST', '/terminal/register', terminal_info)
+        return await self._make_request('POST', '/terminal/register', terminal_info)
     
-    def update_terminal_status(self, terminal_id: str, status: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_terminal_status(self, terminal_id: str, status: Dict[str, Any]) -> Dict[str, Any]:
         """Update terminal status and health info"""
-        return self._make_request('PUT', f'/terminal/{terminal_id}/status', status)
+        return await self._make_request('PUT', _EP_TERM_STATUS.format(terminal_id), status)
     
-    def get_terminal_config(self, terminal_id: str) -> Dict[str, Any]:
+    async def get_terminal_config(self, terminal_id: str) -> Dict[str, Any]:
         """Get terminal-specific configuration"""
-        return self._make_request('GET', f'/terminal/{terminal_id}/config')
+        return await self._make_request('GET', _EP_TERM_CONFIG.format(terminal_id))
     
-    def report_terminal_metrics(self, terminal_id: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    async def report_terminal_metrics(self, terminal_id: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Report terminal performance metrics"""
-        return self._make_request('POST', f'/terminal/{terminal_id}/metrics', metrics)
+        return await self._make_request('POST', _EP_TERM_METRICS.format(terminal_id), metrics)
+    
+    async def aggregate_and_report(self, terminal_id: str, samples: Dict[str, Sequence[float]]) -> Dict[str, Any]:
+        """Summarize raw metric samples locally and report only the summary"""
+        return await self.report_terminal_metrics(terminal_id, summarize_samples(samples))
     
     # Parser Operations
-    def check_parser_updates(self) -> Dict[str, Any]:
+    async def check_parser_updates(self) -> Dict[str, Any]:
         """Check for available parser updates"""
-        return self._make_request('GET', '/parser/updates')
+        return await self._make_request('GET', '/parser/updates')
     
-    def download_parser(self, deployment_id: str) -> Dict[str, Any]:
+    async def download_parser(self, deployment_id: str) -> Dict[str, Any]:
         """Download parser file"""
-        return self._make_request('GET', f'/parser/download/{deployment_id}')
+        return await self._make_request('GET', f'/parser/download/{deployment_id}')
     
-    def acknowledge_parser_deployment(self, deployment_id: str, status: str) -> Dict[str, Any]:
+    async def acknowledge_parser_deployment(self, deployment_id: str, status: str) -> Dict[str, Any]:
         """Acknowledge parser deployment success/failure"""
-        return self._make_request('POST', f'/parser/acknowledge/{deployment_id}', {'status': status})
+        return await self._make_request('POST', f'/parser/acknowledge/{deployment_id}', {'status': status})
     
     # Signal Operations
-    def get_signal_queue(self) -> Dict[str, Any]:
+    async def get_signal_queue(self) -> Dict[str, Any]:
         """Get pending signals for execution"""
-        return self._make_request('GET', '/signals/queue')
+        return await self._make_request('GET', '/signals/queue')
     
-    def report_signal_execution(self, signal_id: int, execution_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def report_signal_execution(self, signal_id: int, execution_data: Dict[str, Any]) -> Dict[str, Any]:
         """Report signal execution results"""
-        return self._make_request('POST', f'/signals/{signal_id}/execution', execution_data)
+        return await self._make_request('POST', _EP_SIGNAL_EXECUTION.format(signal_id), execution_data)
     
-    def get_replay_signals(self) -> Dict[str, Any]:
+    async def get_replay_signals(self) -> Dict[str, Any]:
         """Get signals queued for replay"""
-        return self._make_request('GET', '/signals/replay')
+        return await self._make_request('GET', '/signals/replay')
     
     # Configuration Sync
-    def sync_configuration(self, config_sections: List[str]) -> Dict[str, Any]:
+    async def sync_configuration(self, config_sections: List[str]) -> Dict[str, Any]:
         """Sync configuration sections from admin panel"""
-        return self._make_request('POST', '/config/sync', {'sections': config_sections})
+        return await self._make_request('POST', '/config/sync', {'sections': config_sections})
     
-    def push_local_config(self, config_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def push_local_config(self, config_data: Dict[str, Any]) -> Dict[str, Any]:
         """Push local configuration changes to admin panel"""
-        return self._make_request('POST', '/config/push', config_data)
+        return await self._make_request('POST', '/config/push', config_data)
     
     # Health and Monitoring
-    def send_heartbeat(self, health_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def send_heartbeat(self, health_data: Dict[str, Any]) -> Dict[str, Any]:
         """Send heartbeat with system health data"""
-        return self._make_request('POST', '/health/heartbeat', health_data)
+        return await self._make_request('POST', '/health/heartbeat', health_data)
     
-    def report_error(self, error_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def report_error(self, error_data: Dict[str, Any]) -> Dict[str, Any]:
         """Report system errors to admin panel"""
-        return self._make_request('POST', '/health/error', error_data)
+        return await self._make_request('POST', '/health/error', error_data)
     
-    def get_system_status(self) -> Dict[str, Any]:
+    async def get_system_status(self) -> Dict[str, Any]:
         """Get overall system status from admin panel"""
-        return self._make_request('GET', '/health/status')
+        return await self._make_request('GET', '/health/status')
     
     # Utility Methods
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         """Test connection and authentication with admin panel"""
         try:
-            result = self._make_request('GET', '/health/ping')
+            result = await self._make_request('GET', '/health/ping')
             return result.get('success', False)
         except Exception as e:
             print(f"Connection test failed: {e}")
             return False
     
-    def get_sync_logs(self, limit: int = 50) -> Dict[str, Any]:
+    async def get_sync_logs(self, limit: int = 50) -> Dict[str, Any]:
         """Get recent sync operation logs"""
-        return self._make_request('GET', f'/logs?limit={limit}', use_sync_auth=False)
+        return await self._make_request('GET', f'/logs?limit={limit}', use_sync_auth=False)
     
-    def close(self):
+    async def close(self):
         """Close session and cleanup resources"""
-        self.session.close()
+        await self.session.aclose()
         print("✓ Sync client session closed")
 
 class SyncManager:
@@ -207,17 +288,21 @@ class SyncManager:
         self.config = get_config() if not config_file else self._load_config(config_file)
         self.client: Optional[SecureSyncClient] = None
         self.is_connected = False
+        self._sync_requested: Optional[asyncio.Event] = None
         
     def _load_config(self, config_file: str) -> Dict[str, Any]:
         """Load configuration from file"""
+        if orjson is not None:
+            with open(config_file, 'rb') as f:
+                return orjson.loads(f.read())
         with open(config_file, 'r') as f:
             return json.load(f)
     
-    def connect(self, user_id: int, api_key: str, api_key_id: int) -> bool:
+    async def connect(self, user_id: int, api_key: str, api_key_id: int) -> bool:
         """Connect to admin panel with credentials"""
         try:
             self.client = SecureSyncClient(user_id, api_key, api_key_id)
-            self.is_connected = self.client.test_connection()
+            self.is_connected = await self.client.test_connection()
             
             if self.is_connected:
                 print(f"✓ Connected to admin panel as user {user_id}")
@@ -230,57 +315,104 @@ class SyncManager:
             print(f"❌ Connection failed: {e}")
             return False
     
-    def start_sync_loop(self, interval_seconds: int = 60):
+    async def start_sync_loop(self, interval_seconds: int = 60):
         """Start continuous sync loop"""
         if not self.is_connected or not self.client:
             raise Exception("Not connected to admin panel")
         
         print(f"🔄 Starting sync loop (interval: {interval_seconds}s)")
         
+        # SIGUSR1 (or request_sync) cuts the wait short and runs a cycle immediately
+        loop = asyncio.get_running_loop()
+        self._sync_requested = asyncio.Event()
+        try:
+            loop.add_signal_handler(signal.SIGUSR1, self._sync_requested.set)
+            signal_installed = True
+        except (AttributeError, NotImplementedError, RuntimeError):
+            # No SIGUSR1 on Windows, and signal handlers need the main thread
+            signal_installed = False
+        
         try:
+            # Cycles start on a fixed cadence, however long each one takes.
+            # The loop runs for the life of the process, so its callables are bound to locals
+            monotonic = time.monotonic
+            wait_for = asyncio.wait_for
+            sync_once = self._sync_once
+            sync_requested = self._sync_requested
+            interval = interval_seconds
+            next_deadline = monotonic() + interval
             while True:
                 # Perform sync operations
-                self._sync_once()
-                time.sleep(interval_seconds)
-                
+                await sync_once()
+                now = monotonic()
+                if interval > 0 and next_deadline < now:
+                    # The cycle overran; skip the ticks it missed instead of running them back to back
+                    next_deadline += ((now - next_deadline) // interval + 1) * interval
+                try:
+                    await wait_for(sync_requested.wait(), max(0, next_deadline - now))
+                except asyncio.TimeoutError:
+                    next_deadline += interval
+                else:
+                    # Requested early; the cadence restarts from this cycle
+                    sync_requested.clear()
+                    next_deadline = monotonic() + interval
+                    
         except KeyboardInterrupt:
             print("🛑 Sync loop stopped by user")
+        except asyncio.CancelledError:
+            print("🛑 Sync loop stopped by user")
+            # Propagate so the task ends up cancelled; cleanup still runs in finally
+            raise
         except Exception as e:
             print(f"❌ Sync loop error: {e}")
         finally:
-            self.disconnect()
+            if signal_installed:
+                loop.remove_signal_handler(signal.SIGUSR1)
+            self._sync_requested = None
+            await self.disconnect()
     
-    def _sync_once(self):
+    def request_sync(self):
+        """Run the next sync cycle now instead of waiting for the interval"""
+        if self._sync_requested is not None:
+            self._sync_requested.set()
+    
+    async def _sync_once(self):
         """Perform one sync cycle"""
         if not self.client:
             return
             
         try:
-            # Send heartbeat
             health_data = {
                 'timestamp': time.time(),
                 'status': 'running',
                 'version': self.config.get('system', {}).get('version', '1.0.0')
             }
-            self.client.send_heartbeat(health_data)
             
-            # Check for parser updates
-            updates = self.client.check_parser_updates()
-            if updates.get('hasUpdates'):
+            # Send heartbeat, check for parser updates and for replay signals concurrently
+            results = await asyncio.gather(
+                self.client.send_heartbeat(health_data),
+                self.client.check_parser_updates(),
+                self.client.get_replay_signals(),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"⚠️  Sync cycle warning: {result}")
+            _, updates, replay_signals = results
+            
+            if isinstance(updates, dict) and updates.get('hasUpdates'):
                 print(f"📦 Parser updates available: {updates.get('updateCount', 0)}")
             
-            # Check for replay signals
-            replay_signals = self.client.get_replay_signals()
-            if replay_signals.get('signals'):
+            if isinstance(replay_signals, dict) and replay_signals.get('signals'):
                 print(f"🔄 Replay signals available: {len(replay_signals['signals'])}")
             
         except Exception as e:
             print(f"⚠️  Sync cycle warning: {e}")
     
-    def disconnect(self):
+    async def disconnect(self):
         """Disconnect from admin panel"""
         if self.client:
-            self.client.close()
+            await self.client.close()
             self.client = None
         self.is_connected = False
         print("🔌 Disconnected from admin panel")
@@ -313,8 +445,8 @@ if __name__ == "__main__":
     print("3. Run the test again")
     
     # Uncomment to test with real credentials:
-    # if manager.connect(user_id, api_key, api_key_id):
+    # if asyncio.run(manager.connect(user_id, api_key, api_key_id)):
     #     print("✓ Sync test successful")
-    #     manager.disconnect()
+    #     asyncio.run(manager.disconnect())
     # else:
     #     print("❌ Sync test failed")
\ No newline at end of file
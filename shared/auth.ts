@@ -92,20 +92,32 @@ export class AuthManager {
    * Generate HMAC signature for sync requests
    */
   generateHMACSignature(payload: SyncAuthPayload, apiKey: string): string {
-    const data = `${payload.method}|${payload.endpoint}|${payload.timestamp}|${payload.nonce}|${payload.userId}`;
-    return crypto.createHmac('sha256', apiKey).update(data).digest('hex');
+    return this.computeHMACDigest(payload, apiKey).toString('base64');
   }
 
   /**
-   * Verify HMAC signature
+   * Verify HMAC signature (base64, or hex from older clients)
    */
   verifyHMACSignature(
     payload: SyncAuthPayload,
     signature: string,
     apiKey: string
   ): boolean {
-    const expectedSignature = this.generateHMACSignature(payload, apiKey);
-    return crypto.timingSafeEqual(Buffer.from(signature), Buffer.from(expectedSignature));
+    const expectedDigest = this.computeHMACDigest(payload, apiKey);
+    const isHex = signature.length === expectedDigest.length * 2 && /^[0-9a-f]+$/i.test(signature);
+    const providedDigest = Buffer.from(signature, isHex ? 'hex' : 'base64');
+    if (providedDigest.length !== expectedDigest.length) {
+      return false;
+    }
+    return crypto.timingSafeEqual(providedDigest, expectedDigest);
+  }
+
+  /**
+   * Raw HMAC-SHA256 digest of the signed request fields
+   */
+  private computeHMACDigest(payload: SyncAuthPayload, apiKey: string): Buffer {
+    const data = `${payload.method}|${payload.endpoint}|${payload.timestamp}|${payload.nonce}|${payload.userId}`;
+    return crypto.createHmac('sha256', apiKey).update(data).digest();
   }
 
   /**